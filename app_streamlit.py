@@ -1,6 +1,11 @@
 import pandas as pd
 import streamlit as st
 from src.core.waterfall_logic import calculate_european_waterfall, calculate_american_waterfall
+from src.core.ledger_store import load_ledger
+from src.component_streamlit.background_jobs import input_fingerprint, submit_job, get_job, stream_job
+from src.component_streamlit.large_data_views import paginated_dataframe, period_states_chart, period_states_checkbox
+from src.component_streamlit.period_format import period_format_selectbox, rate_unit_caption
+from src.core.chart_data import summary_for_display
 
 try:
     import plotly.express as px
@@ -36,85 +41,105 @@ def main():
 
     st.sidebar.subheader("Cash Flow Input")
     uploaded_file = st.sidebar.file_uploader("Upload Cash Flow CSV", type=["csv"])
+    period_times = period_format_selectbox(key="app_period_format", container=st.sidebar)
 
     # --- Main Area for Outputs ---
     st.subheader("Waterfall Analysis")
 
     if uploaded_file is not None:
         try:
-            cash_flows_df = pd.read_csv(uploaded_file)
+            cash_flows_df = load_ledger(uploaded_file)
             st.write("Uploaded Cash Flows Preview:")
-            st.dataframe(cash_flows_df.head())
+            paginated_dataframe(cash_flows_df, key="app_cash_flows_page")
+            include_period_states = period_states_checkbox(len(cash_flows_df), key="app_period_states",
+                                                           container=st.sidebar)
+            waterfall_function = (calculate_european_waterfall if fund_model_type == "European (Whole Fund)"
+                                  else calculate_american_waterfall)
+            waterfall_kwargs = dict(
+                lp_commitment=lp_commitment,
+                preferred_return_pct=preferred_return_pct,
+                gp_catch_up_pct=gp_catch_up_pct,
+                carried_interest_gp_share_pct=carried_interest_gp_share_pct,
+                cash_flows_df=cash_flows_df,
+                include_period_states=include_period_states,
+                period_times=period_times
+            )
+            fingerprint = input_fingerprint(fund_model_type, lp_commitment, preferred_return_pct, gp_catch_up_pct,
+                                            carried_interest_gp_share_pct, period_times, include_period_states,
+                                            cash_flows_df)
+
+            # Runs in a background worker; changing an input cancels a run that has not started yet
             if st.button("Calculate Waterfall"):
-                with st.spinner("Calculating..."):
-                    if fund_model_type == "European (Whole Fund)":
-                        results = calculate_european_waterfall(
-                            lp_commitment=lp_commitment,
-                            preferred_return_pct=preferred_return_pct,
-                            gp_catch_up_pct=gp_catch_up_pct,
-                            carried_interest_gp_share_pct=carried_interest_gp_share_pct,
-                            cash_flows_df=cash_flows_df
-                        )
-                    else:
-                        results = calculate_american_waterfall(
-                            lp_commitment=lp_commitment,
-                            preferred_return_pct=preferred_return_pct,
-                            gp_catch_up_pct=gp_catch_up_pct,
-                            carried_interest_gp_share_pct=carried_interest_gp_share_pct,
-                            cash_flows_df=cash_flows_df
-                        )
-
-                    if results is not None:
-                        st.success("Calculation Complete!")
-                        st.write("Results:")
-                        st.json(results)
+                submit_job("app_waterfall_job", fingerprint, [("results", waterfall_function, waterfall_kwargs)])
+
+            job = get_job("app_waterfall_job", fingerprint)
+            if job:
+                results = stream_job(job, progress_text="Calculating...")[0]
+                if results is not None:
+                    st.success("Calculation Complete!")
+                    st.write("Results:")
+                    st.json(summary_for_display(results))  # Per-period tables are charted below instead
+                    rate_unit_caption(period_times)
+                    if not job.get("celebrated"):
                         st.balloons()
-
-                        # Pie Chart visualization of distribution tiers
-                        tiers = results.get("distribution_tiers", {}) if isinstance(results, dict) else {}
-                        if tiers:
-                            st.subheader("Distribution Breakdown (Pie)")
-                            pie_df = pd.DataFrame({"Tier": list(tiers.keys()), "Amount": list(tiers.values())})
-
-                            if px is None:
-                                st.info("Install plotly to view the pie chart visualization.")
-                            else:
-                                fig = px.pie(pie_df, names="Tier", values="Amount", hole=0.3,
-                                             title="LP/GP Distribution Tiers")
-                                fig.update_traces(textposition="inside", textinfo="percent+label")
-                                st.plotly_chart(fig, use_container_width=True)
+                        job["celebrated"] = True
+
+                    # Pie Chart visualization of distribution tiers
+                    tiers = results.get("distribution_tiers", {}) if isinstance(results, dict) else {}
+                    if tiers:
+                        st.subheader("Distribution Breakdown (Pie)")
+                        pie_df = pd.DataFrame({"Tier": list(tiers.keys()), "Amount": list(tiers.values())})
+
+                        if px is None:
+                            st.info("Install plotly to view the pie chart visualization.")
+                        else:
+                            fig = px.pie(pie_df, names="Tier", values="Amount", hole=0.3,
+                                         title="LP/GP Distribution Tiers")
+                            fig.update_traces(textposition="inside", textinfo="percent+label")
+                            st.plotly_chart(fig, use_container_width=True)
 
                             
-                            # Waterfall-style accumulation across tiers
-                            st.subheader("Distribution Waterfall")
-                            if go is None:
-                                st.info("Install plotly to view the waterfall visualization.")
-                            else:
-                                wf_df = pie_df.copy()
-                                waterfall_fig = go.Figure(
-                                    go.Waterfall(
-                                        name="Distribution",
-                                        orientation="v",
-                                        x=wf_df["Tier"],
-                                        measure=["relative"] * len(wf_df),
-                                        y=wf_df["Amount"],
-                                    )
+                        # Waterfall-style accumulation across tiers
+                        st.subheader("Distribution Waterfall")
+                        if go is None:
+                            st.info("Install plotly to view the waterfall visualization.")
+                        else:
+                            wf_df = pie_df.copy()
+                            waterfall_fig = go.Figure(
+                                go.Waterfall(
+                                    name="Distribution",
+                                    orientation="v",
+                                    x=wf_df["Tier"],
+                                    measure=["relative"] * len(wf_df),
+                                    y=wf_df["Amount"],
                                 )
-                                waterfall_fig.update_layout(title="Waterfall Allocation by Tier")
-                                st.plotly_chart(waterfall_fig, use_container_width=True)
-
-                        # Glossary for common terms
-                        glossary_rows = [
-                            {"Term": "IRR", "Definition": "Internal Rate of Return"},
-                            {"Term": "MOIC", "Definition": "Multiple on Invested Capital"},
-                            {"Term": "LP", "Definition": "Limited Partner"},
-                            {"Term": "GP", "Definition": "General Partner"},
-                            {"Term": "Preferred Return", "Definition": "Minimum return owed to LPs before carry"},
-                            {"Term": "Catch-up", "Definition": "Phase where GP receives most cash until carry share is met"},
-                            {"Term": "Carried Interest", "Definition": "GP share of profits after hurdles"},
-                        ]
-                        st.subheader("Glossary")
-                        st.table(pd.DataFrame(glossary_rows))
+                            )
+                            waterfall_fig.update_layout(title="Waterfall Allocation by Tier")
+                            st.plotly_chart(waterfall_fig, use_container_width=True)
+
+                    # Per-period position, aggregated and downsampled server-side for long ledgers
+                    period_states = results.get("period_states") if isinstance(results, dict) else None
+                    if period_states is not None and not period_states.empty:
+                        st.subheader("Position Over Time")
+                        period_states_chart(period_states, [
+                            "LP Cumulative Distributions", "GP Cumulative Distributions",
+                            "LP Unreturned Capital", "GP Carry To Date (Catch-up + Carry)"], key="app_position_chart",
+                            period_times=period_times)
+                        with st.expander("Per-period states"):
+                            paginated_dataframe(period_states, key="app_period_states_page")
+
+                    # Glossary for common terms
+                    glossary_rows = [
+                        {"Term": "IRR", "Definition": "Internal Rate of Return"},
+                        {"Term": "MOIC", "Definition": "Multiple on Invested Capital"},
+                        {"Term": "LP", "Definition": "Limited Partner"},
+                        {"Term": "GP", "Definition": "General Partner"},
+                        {"Term": "Preferred Return", "Definition": "Minimum return owed to LPs before carry"},
+                        {"Term": "Catch-up", "Definition": "Phase where GP receives most cash until carry share is met"},
+                        {"Term": "Carried Interest", "Definition": "GP share of profits after hurdles"},
+                    ]
+                    st.subheader("Glossary")
+                    st.table(pd.DataFrame(glossary_rows))
 
 
         except Exception as e:
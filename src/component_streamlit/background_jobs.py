@@ -0,0 +1,153 @@
+import hashlib
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import pandas as pd
+import streamlit as st
+
+
+# Tasks one session may have running in the shared pool at once; the rest wait in the session's queue
+MAX_RUNNING_TASKS_PER_SESSION = 2
+
+# How long stream_job waits for a task before touching the UI again
+POLL_SECONDS = 0.25
+
+
+@st.cache_resource
+def _get_executor():
+    """One worker pool per server process, shared by every session."""
+    return ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="waterfall")
+
+
+def _session_slots():
+    """
+    The session's task queue and count of running tasks. Workers only see this dict (never
+    st.session_state), so a task can start the session's next queued task when it finishes.
+    """
+    if "_background_job_slots" not in st.session_state:
+        st.session_state["_background_job_slots"] = {
+            "lock": threading.Lock(), "running": 0, "queue": deque(), "executor": _get_executor()}
+    return st.session_state["_background_job_slots"]
+
+
+def _launch(slots):
+    """Hands queued tasks to the pool while the session is below MAX_RUNNING_TASKS_PER_SESSION."""
+    with slots["lock"]:
+        while slots["running"] < MAX_RUNNING_TASKS_PER_SESSION and slots["queue"]:
+            future, function, kwargs = slots["queue"].popleft()
+            if future.set_running_or_notify_cancel():  # False for a task cancelled while queued
+                slots["running"] += 1
+                slots["executor"].submit(_run_task, slots, future, function, kwargs)
+
+
+def _run_task(slots, future, function, kwargs):
+    """Runs one task in a worker, settles its future, then frees the session's slot."""
+    try:
+        future.set_result(function(**kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        with slots["lock"]:
+            slots["running"] -= 1
+        _launch(slots)
+
+
+def input_fingerprint(*parts):
+    """
+    Hashes the inputs of a run (parameters, DataFrames, ...) so a job can tell whether the
+    widgets still describe the run it was submitted for.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, pd.DataFrame):
+            digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def cancel_job(job_key):
+    """
+    Cancels the queued tasks of the job stored under job_key and forgets it. Python cannot stop
+    a task that is already running: it finishes in the background and its result is dropped.
+    It keeps its slot until then, so a session that keeps changing inputs never holds more than
+    MAX_RUNNING_TASKS_PER_SESSION workers of the shared pool; its new tasks queue behind them.
+    """
+    job = st.session_state.pop(job_key, None)
+    if job:
+        for future in job["futures"]:
+            future.cancel()
+
+
+def submit_job(job_key, fingerprint, tasks):
+    """
+    Queues tasks (a list of (label, function, kwargs)) for the background pool and stores their
+    futures, in submission order, in st.session_state[job_key]; labels are only for display, so
+    several tasks may share one. At most MAX_RUNNING_TASKS_PER_SESSION of a session's
+    tasks run at once. A job already running for the same fingerprint is reused; one submitted
+    for different inputs is cancelled first.
+    """
+    job = st.session_state.get(job_key)
+    if job and job["fingerprint"] == fingerprint:
+        return job
+    cancel_job(job_key)
+
+    slots = _session_slots()
+    job = {"fingerprint": fingerprint, "labels": [label for label, _, _ in tasks], "futures": []}
+    with slots["lock"]:
+        for _, function, kwargs in tasks:
+            future = Future()
+            job["futures"].append(future)
+            slots["queue"].append((future, function, kwargs))
+    _launch(slots)
+    st.session_state[job_key] = job
+    return job
+
+
+def get_job(job_key, fingerprint):
+    """
+    Returns the job stored under job_key if it was submitted for `fingerprint`. If the inputs
+    have changed since, the stale job is cancelled and None is returned.
+    """
+    job = st.session_state.get(job_key)
+    if job and job["fingerprint"] != fingerprint:
+        cancel_job(job_key)
+        st.info("Inputs changed since the last run (any unfinished work was cancelled); run it again to update.")
+        return None
+    return job
+
+
+def stream_job(job, on_result=None, progress_text="Calculating..."):
+    """
+    Waits for the job's tasks, calling on_result(index, result) as each one finishes (index is
+    the task's position in the submitted list, see job["labels"] for its label) so results
+    can be rendered incrementally, with a progress bar for the whole job. A task that raised is
+    reported as {"error": message}, like the waterfall functions do for invalid input.
+
+    The wait is split into POLL_SECONDS polls and the progress bar is redrawn after each one;
+    Streamlit can only stop a run when it touches the UI, so this is what lets a widget
+    interaction interrupt a long job. The futures live in session state, so the next run picks
+    up where this one left off instead of recomputing. Returns the results in submission order.
+    """
+    futures = job["futures"]
+    results = {}
+
+    progress = st.progress(0.0, text=progress_text)
+    pending = set(futures)
+    while pending:
+        _, pending = wait(pending, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+        for index, future in enumerate(futures):
+            if index in results or future in pending:
+                continue
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = {"error": str(e)}
+            if on_result is not None:
+                on_result(index, results[index])
+        progress.progress(len(results) / len(futures), text=f"{progress_text} ({len(results)}/{len(futures)})")
+    progress.empty()
+
+    return [results[index] for index in range(len(futures))]
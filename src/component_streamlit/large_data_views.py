@@ -0,0 +1,51 @@
+import streamlit as st
+
+from src.core.chart_data import bucket_periods, downsample_series, paginate
+from src.component_streamlit.period_format import STEP_NAMES
+
+DEFAULT_PAGE_SIZE = 50
+
+# Bucket sizes offered for time-series charts, in steps of the chosen Period Format
+BUCKET_SIZES = [1, 2, 3, 4, 6, 12]
+
+# Ledgers up to this many rows compute per-period states unless the user opts out
+PERIOD_STATES_DEFAULT_MAX_ROWS = 10_000
+
+
+def paginated_dataframe(df, key, page_size=DEFAULT_PAGE_SIZE):
+    """Shows one page of df at a time, so only `page_size` rows are sent to the browser."""
+    if len(df) <= page_size:
+        st.dataframe(df)
+        return
+    page = st.session_state.get(key, 1)  # The page selector below stores its value under `key`
+    rows, n_pages = paginate(df, page, page_size)
+    first_row = (min(page, n_pages) - 1) * page_size + 1
+    st.dataframe(rows)
+    st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1, key=key)
+    st.caption(f"Rows {first_row:,}-{first_row + len(rows) - 1:,} of {len(df):,}")
+
+
+def period_states_checkbox(n_rows, key, container=st):
+    """
+    Lets the user opt in to per-period states (position chart, interim IRRs); on by default for
+    ledgers of up to PERIOD_STATES_DEFAULT_MAX_ROWS rows. Returns include_period_states.
+    """
+    return container.checkbox(
+        "Per-period states", value=n_rows <= PERIOD_STATES_DEFAULT_MAX_ROWS, key=key,
+        help="Position over time and interim IRRs after every period; adds to the run time on long ledgers.")
+
+
+def period_states_chart(period_states, y_columns, key, period_times=None):
+    """
+    Line chart of per-period waterfall states, aggregated server-side into buckets of the chosen
+    number of time steps (see chart_data.bucket_periods) and downsampled (LTTB) so the number of
+    plotted points stays bounded for any ledger length.
+    """
+    steps_per_bucket = st.selectbox(
+        "Aggregate periods", BUCKET_SIZES, key=f"{key}_bucket",
+        format_func=lambda n: "Every period" if n == 1 else f"Every {n} {STEP_NAMES[period_times]}")
+    chart_df = bucket_periods(period_states, steps_per_bucket, period_times=period_times)
+    chart_df = downsample_series(chart_df, "Period", y_columns)
+    st.line_chart(chart_df.set_index("Period")[y_columns])
+    if len(chart_df) < len(period_states):
+        st.caption(f"Showing {len(chart_df):,} of {len(period_states):,} periods.")
@@ -1,9 +1,18 @@
 import streamlit as st
 import pandas as pd
 
+try:
+    from src.component_streamlit.background_jobs import input_fingerprint, submit_job, get_job, stream_job
+except ImportError:
+    from background_jobs import input_fingerprint, submit_job, get_job, stream_job  # Page run from its own directory
+
 # Attempt to import core logic
 try:
     from src.core.waterfall_logic import calculate_european_waterfall, calculate_american_waterfall
+    from src.core.ledger_store import load_ledger
+    from src.component_streamlit.large_data_views import (paginated_dataframe, period_states_chart,
+                                                          period_states_checkbox)
+    from src.component_streamlit.period_format import period_format_selectbox, rate_unit_caption
     # financial_utils are used within waterfall_logic, so direct import here might not be needed
 except ImportError:
     st.error(
@@ -19,6 +28,30 @@ except ImportError:
         return {"error": "Core logic not loaded"}
 
 
+    def load_ledger(source, cache_dir=None):
+        return pd.read_csv(source)
+
+
+    def paginated_dataframe(df, key, page_size=50):
+        st.dataframe(df.head(page_size))
+
+
+    def period_states_chart(period_states, y_columns, key, period_times=None):
+        st.line_chart(period_states.set_index("Period")[y_columns])
+
+
+    def period_states_checkbox(n_rows, key, container=st):
+        return False
+
+
+    def period_format_selectbox(key, container=st):
+        return None
+
+
+    def rate_unit_caption(period_times):
+        pass
+
+
 def display_main_page():
     st.header("Waterfall Model Configuration")
 
@@ -53,92 +86,108 @@ def display_main_page():
     st.markdown("""
     **Cash Flow CSV Format Expected:**
     Please upload a CSV file with the following columns:
-    - `Period` (integer, e.g., 0, 1, 2, ...)
+    - `Period` (integer, e.g., 0, 1, 2, ... or YYYYQ codes; see *Period Format* below)
     - `LP_Contribution` (positive number for capital called from LPs)
     - `GP_Contribution` (positive number for capital called from GPs)
     - `Gross_Fund_Proceeds` (positive number for cash generated by the fund available for distribution)
     """)
     uploaded_file = st.file_uploader("Upload Cash Flow CSV", type=["csv"], key="main_cashflow_upload")
+    period_times = period_format_selectbox(key="main_period_format")
 
     if uploaded_file:
         try:
-            cash_flows_df = pd.read_csv(uploaded_file)
-            st.markdown("**Uploaded Cash Flows Preview:**")
-            st.dataframe(cash_flows_df.head())
-
-            # Validate required columns
-            required_cols = ['Period', 'LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds']
-            if not all(col in cash_flows_df.columns for col in required_cols):
-                st.error(f"CSV file is missing one or more required columns: {', '.join(required_cols)}")
+            # Parsed and validated once per file content; repeat uploads load from the binary cache
+            try:
+                cash_flows_df = load_ledger(uploaded_file)
+            except ValueError as e:
+                st.error(f"Invalid cash flow CSV: {e}")
                 return  # Stop further processing
-
+            st.markdown("**Uploaded Cash Flows Preview:**")
+            paginated_dataframe(cash_flows_df, key="main_cash_flows_page")
+            include_period_states = period_states_checkbox(len(cash_flows_df), key="main_period_states")
+
+            waterfall_function = (calculate_european_waterfall if fund_model_type == "European (Whole Fund)"
+                                  else calculate_american_waterfall)
+            waterfall_kwargs = dict(
+                lp_commitment=lp_commitment_total,
+                preferred_return_pct=preferred_return_pct,
+                gp_catch_up_pct=gp_catch_up_pct,
+                carried_interest_gp_share_pct=carried_interest_gp_share_pct,
+                cash_flows_df=cash_flows_df,
+                include_period_states=include_period_states,
+                period_times=period_times
+            )
+            fingerprint = input_fingerprint(fund_model_type, lp_commitment_total, preferred_return_pct,
+                                            gp_catch_up_pct, carried_interest_gp_share_pct, period_times,
+                                            include_period_states, cash_flows_df)
+
+            # The calculation runs in a background worker, so the page stays responsive; changing any
+            # input cancels a run that has not started yet
             if st.button("Calculate Waterfall", key="main_calculate_button"):
-                with st.spinner("Calculating..."):
-                    results = None
-                    if fund_model_type == "European (Whole Fund)":
-                        results = calculate_european_waterfall(
-                            lp_commitment=lp_commitment_total,
-                            preferred_return_pct=preferred_return_pct,
-                            gp_catch_up_pct=gp_catch_up_pct,
-                            carried_interest_gp_share_pct=carried_interest_gp_share_pct,
-                            cash_flows_df=cash_flows_df
-                        )
-                    elif fund_model_type == "American (Deal-by-Deal)":
-                        results = calculate_american_waterfall(
-                            lp_commitment=lp_commitment_total,
-                            preferred_return_pct=preferred_return_pct,
-                            gp_catch_up_pct=gp_catch_up_pct,
-                            carried_interest_gp_share_pct=carried_interest_gp_share_pct,
-                            cash_flows_df=cash_flows_df
-                        )
-
-                    if results:
-                        if "error" in results:
-                            st.error(results["error"])
-                        else:
-                            st.success("Calculation Complete!")
-                            st.subheader("Results Summary")
-
-                            summary = results.get("summary_metrics", {})
-                            tiers = results.get("distribution_tiers", {})
-                            notes = results.get("notes", {})
-
-                            st.subheader("Key Performance Indicators")
-                            col_met1, col_met2, col_met3, col_met4 = st.columns(4)
-                            with col_met1:
-                                st.metric("LP MOIC", f"{summary.get('LP MOIC', 0):.2f}x")
-                                st.metric("GP MOIC", f"{summary.get('GP MOIC', 0):.2f}x")
-                            with col_met2:
-                                st.metric("LP IRR", f"{summary.get('LP IRR', 0) * 100:.2f}%" if summary.get(
-                                    'LP IRR') is not None else "N/A")
-                                st.metric("GP IRR", f"{summary.get('GP IRR', 0) * 100:.2f}%" if summary.get(
-                                    'GP IRR') is not None else "N/A")
-                            with col_met3:
-                                st.metric("LP Total Received",
-                                          f"${summary.get('LP Total Distributions Received', 0):,.0f}")
-                                st.metric("GP Total Received",
-                                          f"${summary.get('GP Total Distributions Received', 0):,.0f}")
-                            with col_met4:
-                                st.metric("LP Capital Called", f"${summary.get('LP Total Capital Called', 0):,.0f}")
-                                st.metric("GP Capital Called", f"${summary.get('GP Total Capital Called', 0):,.0f}")
-
-                            st.subheader("Distribution by Tiers")
-                            # Create a DataFrame for tier results for better display
-                            tier_data = {
-                                "Tier": list(tiers.keys()),
-                                "Amount (USD M)": [f"{v:,.2f}" for v in tiers.values()]
-                            }
-                            st.table(pd.DataFrame(tier_data))
-
-                            if notes:
-                                st.subheader("Calculation Notes")
-                                for note_key, note_val in notes.items():
-                                    st.markdown(f"- **{note_key}:** {note_val:,.2f}" if isinstance(note_val, (
-                                    int, float)) else f"- **{note_key}:** {note_val}")
-
-                            # st.subheader("Full Results (JSON)") # Optional: for detailed view
-                            # st.json(results)
+                submit_job("main_waterfall_job", fingerprint,
+                           [("results", waterfall_function, waterfall_kwargs)])
+
+            job = get_job("main_waterfall_job", fingerprint)
+            if job:
+                results = stream_job(job, progress_text="Calculating...")[0]
+                if results:
+                    if "error" in results:
+                        st.error(results["error"])
+                    else:
+                        st.success("Calculation Complete!")
+                        st.subheader("Results Summary")
+
+                        summary = results.get("summary_metrics", {})
+                        tiers = results.get("distribution_tiers", {})
+                        notes = results.get("notes", {})
+
+                        st.subheader("Key Performance Indicators")
+                        col_met1, col_met2, col_met3, col_met4 = st.columns(4)
+                        with col_met1:
+                            st.metric("LP MOIC", f"{summary.get('LP MOIC', 0):.2f}x")
+                            st.metric("GP MOIC", f"{summary.get('GP MOIC', 0):.2f}x")
+                        with col_met2:
+                            st.metric("LP IRR", f"{summary.get('LP IRR', 0) * 100:.2f}%" if summary.get(
+                                'LP IRR') is not None else "N/A")
+                            st.metric("GP IRR", f"{summary.get('GP IRR', 0) * 100:.2f}%" if summary.get(
+                                'GP IRR') is not None else "N/A")
+                            rate_unit_caption(period_times)
+                        with col_met3:
+                            st.metric("LP Total Received",
+                                      f"${summary.get('LP Total Distributions Received', 0):,.0f}")
+                            st.metric("GP Total Received",
+                                      f"${summary.get('GP Total Distributions Received', 0):,.0f}")
+                        with col_met4:
+                            st.metric("LP Capital Called", f"${summary.get('LP Total Capital Called', 0):,.0f}")
+                            st.metric("GP Capital Called", f"${summary.get('GP Total Capital Called', 0):,.0f}")
+
+                        st.subheader("Distribution by Tiers")
+                        # Create a DataFrame for tier results for better display
+                        tier_data = {
+                            "Tier": list(tiers.keys()),
+                            "Amount (USD M)": [f"{v:,.2f}" for v in tiers.values()]
+                        }
+                        st.table(pd.DataFrame(tier_data))
+
+                        if notes:
+                            st.subheader("Calculation Notes")
+                            for note_key, note_val in notes.items():
+                                st.markdown(f"- **{note_key}:** {note_val:,.2f}" if isinstance(note_val, (
+                                int, float)) else f"- **{note_key}:** {note_val}")
+
+                        period_states = results.get("period_states")
+                        if period_states is not None and not period_states.empty:
+                            st.subheader("Position Over Time")
+                            period_states_chart(period_states, [
+                                "LP Cumulative Distributions", "GP Cumulative Distributions",
+                                "LP Unreturned Capital", "GP Carry To Date (Catch-up + Carry)"],
+                                key="main_position_chart", period_times=period_times)
+
+                        # st.subheader("Full Results (JSON)") # Optional: for detailed view
+                        # st.json(results)
+                        if not job.get("celebrated"):
                             st.balloons()
+                            job["celebrated"] = True
         except Exception as e:
             st.error(f"An error occurred during processing or calculation: {e}")
             st.exception(e)  # Shows the full traceback for debugging
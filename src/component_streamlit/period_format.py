@@ -0,0 +1,35 @@
+import streamlit as st
+
+# How the ledger's Period column maps to time (label -> period_times for the core functions)
+PERIOD_FORMAT_OPTIONS = {
+    "Sequential (one step per reported period)": None,
+    "Period numbers (gaps count as elapsed periods)": "period",
+    "YYYYQ quarter codes (e.g. 20241)": "yyyyq",
+}
+
+# Name of one time step, for each period_times
+STEP_NAMES = {
+    None: "reported periods",
+    "period": "Period units",
+    "yyyyq": "quarters",
+}
+
+# Unit IRRs and per-period rates are expressed in, for each period_times
+RATE_UNITS = {
+    None: "per reported period",
+    "period": "per unit of the Period column",
+    "yyyyq": "per quarter",
+}
+
+
+def period_format_selectbox(key, container=st):
+    """Lets the user say how Period maps to time; returns the period_times value for the core functions."""
+    label = container.selectbox(
+        "Period Format", list(PERIOD_FORMAT_OPTIONS), key=key,
+        help="IRRs are measured per step of this unit and are not annualized.")
+    return PERIOD_FORMAT_OPTIONS[label]
+
+
+def rate_unit_caption(period_times):
+    """One-line note stating the unit of the IRRs shown."""
+    st.caption(f"IRRs are {RATE_UNITS[period_times]} (not annualized).")
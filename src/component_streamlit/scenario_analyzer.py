@@ -2,22 +2,32 @@ import streamlit as st
 import pandas as pd
 import copy  # To deepcopy parameters for scenarios
 
+try:
+    from src.component_streamlit.background_jobs import input_fingerprint, submit_job, get_job, stream_job
+except ImportError:
+    from background_jobs import input_fingerprint, submit_job, get_job, stream_job  # Page run from its own directory
+
 # Attempt to import core logic
 try:
     from src.core.waterfall_logic import calculate_european_waterfall  # Assuming European for simplicity here
+    from src.core.ledger_store import load_ledger
     #from src.core.financial_utils import calculate_moic
 except ImportError:
     st.warning("Could not import core logic for scenario analyzer.")
 
 
     def calculate_european_waterfall(*args, **kwargs):
-        return {"lp_moic": 0, "gp_moic": 0, "gp_carried_interest": 0}
+        return {"error": "Core logic not loaded"}
 
 
     def calculate_moic(*args, **kwargs):
         return 0.0
 
 
+    def load_ledger(source, cache_dir=None):
+        return pd.read_csv(source)
+
+
 def display_scenario_analyzer():
     """
     Displays the scenario analyzer page.
@@ -62,7 +72,7 @@ def display_scenario_analyzer():
                                           key="scenario_base_upload")
     if base_uploaded_file:
         try:
-            st.session_state.base_cash_flows_df = pd.read_csv(base_uploaded_file)
+            st.session_state.base_cash_flows_df = load_ledger(base_uploaded_file)
             st.markdown("**Base Case Cash Flows Preview:**")
             st.dataframe(st.session_state.base_cash_flows_df.head(3))
         except Exception as e:
@@ -89,66 +99,88 @@ def display_scenario_analyzer():
 
             modifier["distribution_multiplier"] = st.slider(
                 f"Overall Distribution Multiplier for Scenario {i + 1}", 0.5, 3.0, 1.0, 0.1,
-                help="Multiplies all 'TotalDistribution' values in the base cash flow.", key=f"sce_dist_mult_{i}"
+                help="Multiplies all 'Gross_Fund_Proceeds' values in the base cash flow.", key=f"sce_dist_mult_{i}"
             )
             scenarios_params_modifiers.append(modifier)
 
     # --- Analysis & Results ---
+    # Scenarios run in a background pool; results stream into the table as each one finishes
+    fingerprint = input_fingerprint(st.session_state.base_params, scenarios_params_modifiers,
+                                    st.session_state.base_cash_flows_df)
     if st.button("Run Scenario Analysis", key="run_scenario_analysis_button"):
         if st.session_state.base_cash_flows_df is None:
             st.error("Please upload base case cash flows before running analysis.")
         else:
-            results_list = []
-
-            # Base Case Calculation
-            with st.spinner("Calculating Base Case..."):
-                base_results = calculate_european_waterfall(
-                    **st.session_state.base_params,
-                    cash_flows_df=st.session_state.base_cash_flows_df.copy()  # Use a copy
-                )
-                results_list.append({
-                    "Scenario Name": "Base Case",
-                    "LP MOIC": base_results.get("lp_moic", "N/A"),  # Adjust key based on actual return
-                    "GP MOIC": base_results.get("gp_moic", "N/A"),
-                    "GP Carried Interest": base_results.get("gp_carried_interest", "N/A"),
-                    "Preferred Return (%)": st.session_state.base_params["preferred_return_pct"] * 100,
-                    "Distribution Multiplier": 1.0
-                })
-
-            # Scenario Calculations
-            for i, mod in enumerate(scenarios_params_modifiers):
-                with st.spinner(f"Calculating {mod['name']}..."):
-                    scenario_params = copy.deepcopy(st.session_state.base_params)
-                    scenario_params["preferred_return_pct"] = mod["preferred_return_pct_new"]
-
-                    scenario_cash_flows_df = st.session_state.base_cash_flows_df.copy()
-                    if 'TotalDistribution' in scenario_cash_flows_df.columns:
-                        scenario_cash_flows_df['TotalDistribution'] = scenario_cash_flows_df['TotalDistribution'] * mod[
-                            "distribution_multiplier"]
-                    else:
-                        st.warning(
-                            f"Column 'TotalDistribution' not found in cash flows for {mod['name']}. Multiplier not applied.")
-
-                    scenario_results = calculate_european_waterfall(
-                        **scenario_params,
-                        cash_flows_df=scenario_cash_flows_df
-                    )
-                    results_list.append({
-                        "Scenario Name": mod["name"],
-                        "LP MOIC": scenario_results.get("lp_moic", "N/A"),
-                        "GP MOIC": scenario_results.get("gp_moic", "N/A"),
-                        "GP Carried Interest": scenario_results.get("gp_carried_interest", "N/A"),
-                        "Preferred Return (%)": mod["preferred_return_pct_new"] * 100,
-                        "Distribution Multiplier": mod["distribution_multiplier"]
-                    })
-
-            st.subheader("Scenario Comparison Results")
-            results_df = pd.DataFrame(results_list)
-            st.dataframe(results_df)
-
+            base_modifier = {"name": "Base Case",
+                             "preferred_return_pct_new": st.session_state.base_params["preferred_return_pct"],
+                             "distribution_multiplier": 1.0}
+            tasks = [(mod["name"], _run_scenario,
+                      {"base_params": copy.deepcopy(st.session_state.base_params),
+                       "base_cash_flows_df": st.session_state.base_cash_flows_df,
+                       "modifier": mod})
+                     for mod in [base_modifier] + scenarios_params_modifiers]
+            submit_job("scenario_job", fingerprint, tasks)
+
+    job = get_job("scenario_job", fingerprint)
+    if job:
+        st.subheader("Scenario Comparison Results")
+        table_placeholder = st.empty()
+        rows = {}
+
+        def show_row(index, row):
+            # Rows of tasks that raised only carry the error; names need not be unique
+            rows[index] = {"Scenario Name": job["labels"][index], **row}
+            # Keep submission order regardless of completion order
+            table_placeholder.dataframe(pd.DataFrame([rows[index] for index in sorted(rows)]))
+
+        stream_job(job, on_result=show_row, progress_text="Running scenarios...")
+
+        results_df = pd.DataFrame([rows[index] for index in sorted(rows)])
+        if "error" in results_df.columns:
+            failed = results_df["error"].notna()
+            for name, error in results_df.loc[failed, ["Scenario Name", "error"]].itertuples(index=False):
+                st.error(f"{name}: {error}")
+            results_df = results_df[~failed]
+        if not results_df.empty:
             # Placeholder for comparative charts
-            st.bar_chart(results_df.set_index('Scenario Name')[['LP MOIC', 'GP MOIC']])
+            # Number repeated names so every scenario keeps its own bar
+            names = results_df['Scenario Name']
+            repeat = names.groupby(names).cumcount() + 1
+            chart_names = names.where(~names.duplicated(keep=False), names + " (" + repeat.astype(str) + ")")
+            st.bar_chart(results_df.set_index(chart_names)[['LP MOIC', 'GP MOIC']])
+
 
+def _run_scenario(base_params, base_cash_flows_df, modifier):
+    """
+    Runs one scenario (executed in a background worker, so it must not call Streamlit) and
+    returns its row for the comparison table.
+    """
+    scenario_params = copy.deepcopy(base_params)
+    scenario_params.pop("gp_commitment", None)  # GP capital comes from the ledger, not the waterfall inputs
+    scenario_params["preferred_return_pct"] = modifier["preferred_return_pct_new"]
+
+    scenario_cash_flows_df = base_cash_flows_df.copy()
+    scenario_cash_flows_df['Gross_Fund_Proceeds'] = (
+            scenario_cash_flows_df['Gross_Fund_Proceeds'] * modifier["distribution_multiplier"])
+
+    scenario_results = calculate_european_waterfall(
+        **scenario_params,
+        cash_flows_df=scenario_cash_flows_df
+    )
+    if "error" in scenario_results:
+        return {"Scenario Name": modifier["name"], "error": scenario_results["error"]}
+
+    summary = scenario_results.get("summary_metrics", {})
+    tiers = scenario_results.get("distribution_tiers", {})
+    return {
+        "Scenario Name": modifier["name"],
+        "LP MOIC": summary.get("LP MOIC"),
+        "GP MOIC": summary.get("GP MOIC"),
+        "GP Carried Interest": tiers.get("GP Catch-up Profit Paid", 0.0)
+                               + tiers.get("GP Carried Interest Paid (from Final Split)", 0.0),
+        "Preferred Return (%)": modifier["preferred_return_pct_new"] * 100,
+        "Distribution Multiplier": modifier["distribution_multiplier"]
+    }
 
 if __name__ == '__main__':
     # This allows you to run this component page standalone for testing
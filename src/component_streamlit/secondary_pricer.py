@@ -0,0 +1,134 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+# Attempt to import core logic
+try:
+    from src.core.secondary_pricing import price_lp_interest, scale_future_proceeds
+    from src.core.ledger_store import load_ledger
+    from src.component_streamlit.period_format import RATE_UNITS, period_format_selectbox
+except ImportError:
+    st.warning("Could not import core logic for secondary pricing. Run this page from the repository root with "
+               "`python -m streamlit run src/component_streamlit/secondary_pricer.py`.")
+
+
+    def price_lp_interest(*args, **kwargs):
+        raise ValueError("Core logic not loaded")
+
+
+    def scale_future_proceeds(proceeds, future_mask, exit_multiples):
+        return np.atleast_2d(proceeds)
+
+
+    def load_ledger(source, cache_dir=None):
+        return pd.read_csv(source)
+
+
+    RATE_UNITS = {None: "per reported period"}
+
+
+    def period_format_selectbox(key, container=st):
+        return None
+
+
+def display_secondary_pricer():
+    """
+    Displays the secondary pricing page.
+    Prices an LP interest by discounting the LP's projected waterfall distributions across
+    many exit scenarios and discount rates, and charts the resulting price-to-NAV curve.
+    """
+    st.header("Secondary Pricing")
+    st.markdown("""
+    Upload a ledger with actual cash flows up to the valuation date and projected flows after it.
+    Projected proceeds are scaled by a random exit multiple in each scenario, every scenario is run
+    through the waterfall, and the LP's future net cash flows are discounted at a range of rates.
+    """)
+
+    uploaded_file = st.file_uploader("Upload Cash Flow CSV (actuals + projections)", type=["csv"],
+                                     key="secondary_upload")
+    if not uploaded_file:
+        st.info("Upload a cash flow CSV to price the LP interest.")
+        return
+    try:
+        cash_flows_df = load_ledger(uploaded_file)
+    except ValueError as e:
+        st.error(f"Error loading cash flows: {e}")
+        return
+
+    # --- Waterfall Terms ---
+    st.subheader("Fund Terms")
+    col1, col2 = st.columns(2)
+    with col1:
+        model = st.selectbox("Waterfall Model", ["European", "American"], key="sec_model")
+        lp_commitment = st.number_input("LP Commitment (M)", value=90.0, key="sec_lp_commit")
+        preferred_return_pct = st.number_input("Preferred Return (%)", value=8.0, key="sec_pref_ret") / 100
+    with col2:
+        gp_catch_up_pct = st.number_input("GP Catch-up (%)", value=100.0, key="sec_catch_up") / 100
+        carried_interest_gp_share_pct = st.number_input("GP Carry (%)", value=20.0, key="sec_gp_carry") / 100
+
+    # --- Sale Assumptions ---
+    st.subheader("Sale Assumptions")
+    periods = np.unique(cash_flows_df['Period'].to_numpy())
+    col1, col2 = st.columns(2)
+    with col1:
+        valuation_period = st.selectbox("Valuation Period", periods.tolist(), index=len(periods) // 2,
+                                        key="sec_valuation_period")
+        nav_reported = (cash_flows_df.loc[cash_flows_df['Period'] == valuation_period, 'NAV'].dropna()
+                        if 'NAV' in cash_flows_df.columns else pd.Series(dtype=float))
+        fund_nav = st.number_input("Fund NAV at Valuation (M)", min_value=0.01,
+                                   value=float(nav_reported.iloc[-1]) if len(nav_reported) else 50.0,
+                                   help="Gross fund NAV, split between LP and GP as if it were distributed through "
+                                        "the waterfall at the valuation period. Defaults to the ledger's NAV there.",
+                                   key="sec_nav")
+        num_scenarios = st.slider("Exit Scenarios", 100, 5000, 2000, 100, key="sec_num_scenarios")
+    with col2:
+        exit_multiple_median = st.slider("Median Exit Multiple on Projections", 0.25, 3.0, 1.0, 0.05,
+                                         key="sec_exit_median")
+        exit_multiple_volatility = st.slider("Exit Multiple Volatility", 0.0, 1.0, 0.3, 0.05, key="sec_exit_vol")
+        period_times = period_format_selectbox(key="sec_period_format")
+        rate_range = st.slider(f"Discount Rates {RATE_UNITS[period_times]} (%)", 0.0, 40.0, (0.0, 20.0), 0.5,
+                               key="sec_rates")
+
+    # Fixed seed so reruns (and the same inputs) give the same scenarios
+    rng = np.random.default_rng(0)
+    exit_multiples = exit_multiple_median * rng.lognormal(0.0, exit_multiple_volatility, num_scenarios)
+    proceeds = cash_flows_df.groupby('Period')['Gross_Fund_Proceeds'].sum().to_numpy()
+    proceeds_scenarios = scale_future_proceeds(proceeds, periods > valuation_period, exit_multiples)
+    discount_rates = np.linspace(rate_range[0], rate_range[1], 41) / 100
+
+    try:
+        pricing = price_lp_interest(
+            cash_flows_df, proceeds_scenarios, model, lp_commitment, preferred_return_pct, gp_catch_up_pct,
+            carried_interest_gp_share_pct, discount_rates, valuation_period, fund_nav=fund_nav,
+            period_times=period_times)
+    except ValueError as e:
+        st.error(f"Pricing failed: {e}")
+        return
+
+    # --- Results ---
+    st.subheader("Price-to-NAV Curve")
+    lp_nav = float(np.median(pricing["lp_nav"]))
+    st.caption(f"Prices are quoted against the LP NAV at valuation: the LP's share of the fund NAV in a "
+               f"hypothetical liquidation ({lp_nav:,.2f}M, median across scenarios).")
+    curve = pricing["curve"].copy()
+    curve["Discount Rate (%)"] = curve.pop("Discount Rate") * 100
+    st.line_chart(curve.set_index("Discount Rate (%)"))
+
+    target_rate = st.select_slider("Buyer's Target Return (%)", options=curve["Discount Rate (%)"].round(2).tolist(),
+                                   key="sec_target_rate")
+    target = curve.loc[curve["Discount Rate (%)"].round(2) == target_rate].iloc[0]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("LP NAV at Valuation (M)", f"{lp_nav:,.2f}")
+    col2.metric("Median Price to NAV", f"{target['P50 Price to NAV']:.1%}")
+    col3.metric("Median Price (M)", f"{np.median(pricing['npv'][:, target.name]):,.2f}")
+    col4.metric("P10-P90 Price to NAV", f"{target['P10 Price to NAV']:.1%} - {target['P90 Price to NAV']:.1%}")
+
+    with st.expander("Pricing curve table"):
+        st.dataframe(curve)
+
+
+if __name__ == '__main__':
+    # Standalone page: python -m streamlit run src/component_streamlit/secondary_pricer.py (from the repository root)
+    st.set_page_config(page_title="Secondary Pricing Test", layout="wide")
+    st.sidebar.info("Running secondary_pricer.py directly for testing.")
+    display_secondary_pricer()
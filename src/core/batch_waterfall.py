@@ -0,0 +1,143 @@
+import numpy as np
+
+from .waterfall_logic import _aggregate_by_period, _allocate_tiers, _period_nav
+
+# Keys of the per-period (n_cases, n_periods) arrays returned by run_waterfall_batch
+BATCH_OUTPUT_KEYS = [
+    "LP Distributions",
+    "GP Distributions",
+    "LP Unreturned Capital",
+    "GP Unreturned Capital",
+    "LP Preferred Return Paid",
+    "LP Preferred Return Unpaid",
+    "GP Catch-up Profit Paid",
+    "GP Carried Interest Paid",
+]
+
+
+def stack_ledgers(cash_flows_dfs):
+    """
+    Puts several ledgers on a common (n_cases, n_periods) grid, each on its own compact period index
+    (see waterfall_logic._aggregate_by_period) and padded at the end.
+
+    Returns a dict with 'periods', 'lp_contributions', 'gp_contributions', 'proceeds', 'nav'
+    (NaN where not reported) and 'active' (False on padding).
+    """
+    aggregated = [_aggregate_by_period(df) for df in cash_flows_dfs]
+    n_periods = max((len(periods) for periods, _, _, _ in aggregated), default=0)
+    shape = (len(aggregated), n_periods)
+    period_dtype = np.result_type(*[periods for periods, _, _, _ in aggregated]) if aggregated else float
+
+    stacked = {
+        "periods": np.zeros(shape, dtype=period_dtype),
+        "lp_contributions": np.zeros(shape),
+        "gp_contributions": np.zeros(shape),
+        "proceeds": np.zeros(shape),
+        "nav": np.full(shape, np.nan),
+        "active": np.zeros(shape, dtype=bool),
+    }
+    for i, (cash_flows_df, aggregate) in enumerate(zip(cash_flows_dfs, aggregated)):
+        periods, lp_contributions, gp_contributions, proceeds = aggregate
+        n = len(periods)
+        stacked["periods"][i, :n] = periods
+        stacked["lp_contributions"][i, :n] = lp_contributions
+        stacked["gp_contributions"][i, :n] = gp_contributions
+        stacked["proceeds"][i, :n] = proceeds
+        stacked["active"][i, :n] = True
+        nav = _period_nav(cash_flows_df, periods)
+        if nav is not None:
+            stacked["nav"][i, :n] = nav
+    return stacked
+
+
+def run_waterfall_batch(
+        model,  # "European" (whole fund) or "American" (deal-by-deal)
+        lp_contributions,  # (n_cases, n_periods) LP capital called per period
+        gp_contributions,  # (n_cases, n_periods) GP capital called per period
+        proceeds,  # (n_cases, n_periods) Gross fund proceeds per period
+        lp_commitment,  # Scalar or (n_cases,) - same meaning as in the single-ledger functions
+        preferred_return_pct,  # Scalar or (n_cases,)
+        gp_catch_up_pct,  # Scalar or (n_cases,)
+        carried_interest_gp_share_pct,  # Scalar or (n_cases,)
+        active=None,  # Optional (n_cases, n_periods) bool mask; False marks padding after a ledger ends
+        nav=None  # Optional (n_cases, n_periods) NAV for hypothetical liquidation at each period end
+):
+    """
+    Runs many waterfalls at once: one Python loop over periods, with every case (fund, scenario,
+    sensitivity point) advanced together as NumPy arrays through the same tier step the scalar
+    engines follow (waterfall_logic._allocate_tiers). Matches calculate_european_waterfall /
+    calculate_american_waterfall case by case for ledgers on a compact period index.
+
+    Returns a dict of (n_cases, n_periods) arrays keyed by BATCH_OUTPUT_KEYS, plus
+    'Hypothetical Liquidation Carry' when `nav` is given. Values on padded periods repeat the
+    last state and carry no distributions.
+    """
+    if model not in ("European", "American"):
+        raise ValueError(f"Unknown waterfall model: {model}")
+
+    lp_contributions = np.asarray(lp_contributions, dtype=float)
+    gp_contributions = np.asarray(gp_contributions, dtype=float)
+    proceeds = np.asarray(proceeds, dtype=float)
+    n_cases, n_periods = proceeds.shape
+    active = np.ones((n_cases, n_periods), dtype=bool) if active is None else np.asarray(active, dtype=bool)
+
+    preferred_return_pct = np.broadcast_to(np.asarray(preferred_return_pct, dtype=float), (n_cases,))
+    gp_catch_up_pct = np.broadcast_to(np.asarray(gp_catch_up_pct, dtype=float), (n_cases,))
+    carried_interest_gp_share_pct = np.broadcast_to(np.asarray(carried_interest_gp_share_pct, dtype=float), (n_cases,))
+
+    outputs = {key: np.zeros((n_cases, n_periods)) for key in BATCH_OUTPUT_KEYS}
+
+    lp_capital_remaining = np.zeros(n_cases)
+    gp_capital_remaining = np.zeros(n_cases)
+    pref_remaining = np.zeros(n_cases)
+    if model == "European":
+        # Whole fund: all capital ever called is returned first, and the pref is a fixed total hurdle
+        lp_capital_remaining += lp_contributions.sum(axis=1)
+        gp_capital_remaining += gp_contributions.sum(axis=1)
+        pref_remaining += np.broadcast_to(np.asarray(lp_commitment, dtype=float), (n_cases,)) * preferred_return_pct
+    lp_pref_paid = np.zeros(n_cases)
+    gp_catch_up_paid = np.zeros(n_cases)
+    gp_carry_paid = np.zeros(n_cases)
+
+    for t in range(n_periods):
+        if model == "American":
+            # Contributions at the start of the period, then pref accrues on outstanding LP capital
+            lp_capital_remaining += lp_contributions[:, t]
+            gp_capital_remaining += gp_contributions[:, t]
+            pref_remaining += np.where(active[:, t], lp_capital_remaining * preferred_return_pct, 0.0)
+
+        lp_capital, gp_capital, lp_pref, gp_catch_up, lp_split, gp_split = _allocate_tiers(
+            proceeds[:, t], lp_capital_remaining, gp_capital_remaining, pref_remaining, lp_pref_paid,
+            gp_catch_up_paid, gp_catch_up_pct, carried_interest_gp_share_pct)
+
+        lp_capital_remaining -= lp_capital
+        gp_capital_remaining -= gp_capital
+        pref_remaining -= lp_pref
+        lp_pref_paid += lp_pref
+        gp_catch_up_paid += gp_catch_up
+        gp_carry_paid += gp_split
+
+        outputs["LP Distributions"][:, t] = lp_capital + lp_pref + lp_split
+        outputs["GP Distributions"][:, t] = gp_capital + gp_catch_up + gp_split
+        outputs["LP Unreturned Capital"][:, t] = lp_capital_remaining
+        outputs["GP Unreturned Capital"][:, t] = gp_capital_remaining
+        outputs["LP Preferred Return Paid"][:, t] = lp_pref_paid
+        outputs["LP Preferred Return Unpaid"][:, t] = pref_remaining
+        outputs["GP Catch-up Profit Paid"][:, t] = gp_catch_up_paid
+        outputs["GP Carried Interest Paid"][:, t] = gp_carry_paid
+
+    if nav is not None:
+        # Every (case, period) liquidation is independent of the others: one broadcast tier step
+        tiers = _allocate_tiers(
+            np.asarray(nav, dtype=float),
+            outputs["LP Unreturned Capital"],
+            outputs["GP Unreturned Capital"],
+            outputs["LP Preferred Return Unpaid"],
+            outputs["LP Preferred Return Paid"],
+            outputs["GP Catch-up Profit Paid"],
+            gp_catch_up_pct[:, None],
+            carried_interest_gp_share_pct[:, None],
+        )
+        outputs["Hypothetical Liquidation Carry"] = tiers[3] + tiers[5]
+
+    return outputs
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from .batch_waterfall import run_waterfall_batch, stack_ledgers
+
+
+def _per_fund(value, fund_names):
+    """Expands a term given either as one value for all funds or as a {fund: value} mapping."""
+    if isinstance(value, dict):
+        return np.array([value[name] for name in fund_names], dtype=float)
+    return np.full(len(fund_names), float(value))
+
+
+def calculate_accrued_carry(
+        funds,  # {fund name: ledger DataFrame with the usual columns plus 'NAV'}
+        model,  # "European" or "American"
+        lp_commitment,  # Scalar or {fund name: value}
+        preferred_return_pct,  # Scalar or {fund name: value}
+        gp_catch_up_pct,  # Scalar or {fund name: value}
+        carried_interest_gp_share_pct  # Scalar or {fund name: value}
+):
+    """
+    Accrued carry time series for a whole platform, for booking carry each reporting period.
+
+    At every period with a reported NAV, the unrealized NAV is treated as if it were distributed
+    at that date, on top of what has actually been paid so far, and pushed through the same
+    tiers as real proceeds. All funds are advanced together in one batched waterfall pass, and
+    the hypothetical liquidations for every (fund, period) are evaluated in a single broadcast
+    step rather than by re-running the waterfall per reporting date.
+
+    Returns a long DataFrame with one row per fund and period: Fund, Period, NAV, GP Carry To Date
+    (actually paid catch-up + carry), Hypothetical Liquidation Carry and GP Accrued Carry (their sum).
+    Periods without a NAV have NaN accruals.
+    """
+    fund_names = list(funds)
+    missing_nav = [name for name in fund_names if 'NAV' not in funds[name].columns]
+    if missing_nav:
+        raise ValueError(f"Ledgers are missing a 'NAV' column: {', '.join(map(str, missing_nav))}")
+
+    stacked = stack_ledgers([funds[name] for name in fund_names])
+    outputs = run_waterfall_batch(
+        model,
+        stacked["lp_contributions"],
+        stacked["gp_contributions"],
+        stacked["proceeds"],
+        _per_fund(lp_commitment, fund_names),
+        _per_fund(preferred_return_pct, fund_names),
+        _per_fund(gp_catch_up_pct, fund_names),
+        _per_fund(carried_interest_gp_share_pct, fund_names),
+        active=stacked["active"],
+        nav=stacked["nav"],
+    )
+
+    active = stacked["active"]
+    carry_to_date = outputs["GP Catch-up Profit Paid"] + outputs["GP Carried Interest Paid"]
+    return pd.DataFrame({
+        "Fund": np.repeat(np.array(fund_names, dtype=object), active.shape[1])[active.ravel()],
+        "Period": stacked["periods"][active],
+        "NAV": stacked["nav"][active],
+        "GP Carry To Date": carry_to_date[active],
+        "Hypothetical Liquidation Carry": outputs["Hypothetical Liquidation Carry"][active],
+        "GP Accrued Carry": (carry_to_date + outputs["Hypothetical Liquidation Carry"])[active],
+    })
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from .waterfall_logic import resolve_period_times
+
+# Upper bound on points sent to the browser per line chart
+MAX_CHART_POINTS = 500
+
+
+def bucket_periods(df, steps_per_bucket, period_col="Period", flow_columns=(), period_times=None):
+    """
+    Aggregates a per-period table (one row per period, sorted) into buckets spanning
+    `steps_per_bucket` steps of time, with times from waterfall_logic.resolve_period_times: by
+    default one step per row, so gapped or coded Periods bucket by position; with "yyyyq",
+    buckets of 4 are calendar years. Flow columns are summed; every other column is a balance or
+    cumulative figure, so the value at the end of the bucket is kept. Each bucket is labelled by
+    the first period it covers.
+    """
+    if steps_per_bucket <= 1 or df.empty:
+        return df
+    times = resolve_period_times(df[period_col].to_numpy(), period_times)
+    bucket = np.floor(times / steps_per_bucket)
+    aggregations = {col: ("sum" if col in flow_columns else "last") for col in df.columns}
+    aggregations[period_col] = "first"
+    return df.groupby(bucket, sort=True).agg(aggregations).reset_index(drop=True)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling: returns the indices of `n_out` points of (x, y)
+    that preserve the visual shape of the line (peaks and troughs are kept, flat runs collapse).
+    The first and last points are always kept. NaNs in y are ignored when choosing points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    bucket_size = (n - 2) / (n_out - 2)
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for i in range(n_out - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        # Pick the point forming the largest triangle with the last selected point and the next bucket's mean
+        areas = np.abs((x[selected] - next_x) * (y[start:end] - y[selected])
+                       - (x[selected] - x[start:end]) * (next_y - y[selected]))
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+def downsample_series(df, x_col, y_cols, max_points=MAX_CHART_POINTS):
+    """
+    Returns at most `max_points` rows of df (every series is drawn from the same rows) for
+    drawing each of y_cols against x_col: the union of each column's LTTB selection, with the
+    budget split evenly between the columns.
+    """
+    if len(df) <= max_points:
+        return df
+    x = df[x_col].to_numpy()
+    points_per_column = max(3, max_points // max(1, len(y_cols)))
+    keep = np.unique(np.concatenate([lttb_indices(x, df[col].to_numpy(), points_per_column) for col in y_cols]))
+    if len(keep) > max_points:  # Only with more than max_points / 3 columns
+        keep = keep[np.linspace(0, len(keep) - 1, max_points).astype(int)]
+    return df.iloc[keep]
+
+
+def paginate(df, page, page_size):
+    """Returns (rows of the 1-based `page`, number of pages) for a table shown page by page."""
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(1, int(page)), n_pages)
+    return df.iloc[(page - 1) * page_size: page * page_size], n_pages
+
+
+def summary_for_display(results):
+    """The scalar sections of a waterfall result, without per-period tables (safe for st.json)."""
+    return {key: value for key, value in results.items() if not isinstance(value, pd.DataFrame)}
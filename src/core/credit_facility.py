@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+from .batch_waterfall import run_waterfall_batch
+from .financial_utils import calculate_irr, calculate_moic
+from .waterfall_logic import _aggregate_by_period, _period_nav, resolve_period_times
+
+# Columns a facility schedule must provide (amounts per Period, on the ledger's periods)
+FACILITY_COLUMNS = ['Period', 'Facility_Draw', 'Facility_Repayment']
+
+
+def facility_schedule(
+        times,  # (n_periods,) time of each period on the compact index (see waterfall_logic.resolve_period_times)
+        lp_contributions,  # (..., n_periods) LP capital calls before the facility
+        draws,  # (..., n_periods) facility drawn to fund (part of) each capital call
+        repayments,  # (..., n_periods) facility repaid with capital called from LPs
+        interest_rate_pct,  # Scalar or (...,) simple interest per unit of time on the drawn balance
+        commitment_fee_pct=0.0,  # Scalar or (...,) fee per unit of time on the undrawn limit
+        facility_limit=None  # Scalar or (...,) facility size; required for commitment fees
+):
+    """
+    Applies a subscription line to LP capital calls, for one schedule or many at once (every
+    leading axis is a separate scenario). Everything is computed with array operations:
+
+    - A draw at a period pays for that much of the period's capital call, so LPs are called later.
+    - The drawn balance is the running sum of draws less repayments. Interest (and the fee on the
+      undrawn limit) for the time since the previous period is charged at each period, scaled by
+      the time elapsed, and called from LPs along with any repayment.
+    - Whatever is still drawn at the last period is repaid then.
+
+    Returns a dict of arrays: 'LP_Contribution' (the adjusted capital calls), 'Facility Draw',
+    'Facility Repayment' (including the final payoff), 'Facility Balance' (after each period),
+    'Facility Interest' and 'Facility Fees'. Raises ValueError for an inconsistent schedule.
+    """
+    times = np.asarray(times, dtype=float)
+    lp_contributions, draws, repayments = np.broadcast_arrays(np.asarray(lp_contributions, dtype=float),
+                                                              np.asarray(draws, dtype=float),
+                                                              np.asarray(repayments, dtype=float))
+    repayments = repayments.copy()  # The final payoff is added in place
+
+    if (draws < 0).any() or (repayments < 0).any():
+        raise ValueError("Facility draws and repayments must not be negative.")
+    if (draws > lp_contributions + 1e-9 * np.abs(lp_contributions)).any():
+        raise ValueError("Facility draws cannot exceed the LP capital call they fund.")
+
+    balance = np.cumsum(draws - repayments, axis=-1)
+    if (balance < -1e-9 * max(1.0, draws.sum(axis=-1).max(initial=0.0))).any():
+        raise ValueError("Facility repayments exceed the drawn balance.")
+    if facility_limit is not None:
+        limit = np.asarray(facility_limit, dtype=float)[..., None]
+        if (balance > limit * (1 + 1e-12)).any():
+            raise ValueError("Facility balance exceeds the facility limit.")
+
+    # Pay off what is still drawn at the last period
+    if balance.shape[-1]:
+        repayments[..., -1] += balance[..., -1]
+        balance[..., -1] = 0.0
+
+    # Charges for the time since the previous period, on the balance outstanding over that time
+    prior_balance = np.concatenate([np.zeros_like(balance[..., :1]), balance[..., :-1]], axis=-1)
+    elapsed = np.diff(times, prepend=times[:1])
+    interest = np.asarray(interest_rate_pct, dtype=float)[..., None] * prior_balance * elapsed
+    fees = np.zeros_like(interest)
+    if np.any(commitment_fee_pct):
+        if facility_limit is None:
+            raise ValueError("A facility limit is required to charge commitment fees.")
+        fees = np.asarray(commitment_fee_pct, dtype=float)[..., None] * (limit - prior_balance) * elapsed
+
+    return {
+        "LP_Contribution": lp_contributions - draws + repayments + interest + fees,
+        "Facility Draw": np.array(draws),
+        "Facility Repayment": repayments,
+        "Facility Balance": balance,
+        "Facility Interest": interest,
+        "Facility Fees": fees,
+    }
+
+
+def apply_credit_facility(
+        cash_flows_df,  # DataFrame with 'Period', 'LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds'
+        facility_df,  # DataFrame with FACILITY_COLUMNS; periods must appear in the ledger
+        interest_rate_pct,  # Simple interest per period step on the drawn balance (e.g., 0.015 per quarter)
+        commitment_fee_pct=0.0,  # Fee per period step on the undrawn limit
+        facility_limit=None,  # Facility size; required for commitment fees
+        period_times=None  # How Period maps to time, as in the waterfall functions
+):
+    """
+    Returns the ledger as seen by LPs when capital calls are bridged by a subscription line,
+    ready for calculate_european_waterfall / calculate_american_waterfall. The ledger is put on
+    its compact period index (one row per period), LP_Contribution is adjusted as described in
+    facility_schedule, and the facility's draws, repayments, balance, interest and fees are
+    added as columns. A 'NAV' column is kept.
+    """
+    missing = [col for col in FACILITY_COLUMNS if col not in facility_df.columns]
+    if missing:
+        raise ValueError(f"Facility schedule is missing required columns: {', '.join(missing)}")
+
+    periods, lp_contributions, gp_contributions, proceeds = _aggregate_by_period(cash_flows_df)
+    facility_periods = facility_df['Period'].to_numpy()
+    codes = np.searchsorted(periods, facility_periods)
+    unknown = (codes >= len(periods)) | (periods[np.minimum(codes, len(periods) - 1)] != facility_periods)
+    if unknown.any():
+        raise ValueError(f"Facility schedule has periods not in the ledger: {facility_periods[unknown][:5].tolist()}")
+
+    draws = np.bincount(codes, weights=facility_df['Facility_Draw'].to_numpy(dtype=float), minlength=len(periods))
+    repayments = np.bincount(codes, weights=facility_df['Facility_Repayment'].to_numpy(dtype=float),
+                             minlength=len(periods))
+    schedule = facility_schedule(resolve_period_times(periods, period_times), lp_contributions, draws, repayments,
+                                 interest_rate_pct, commitment_fee_pct, facility_limit)
+
+    adjusted_df = pd.DataFrame({
+        'Period': periods,
+        'LP_Contribution': schedule["LP_Contribution"],
+        'GP_Contribution': gp_contributions,
+        'Gross_Fund_Proceeds': proceeds,
+    })
+    nav = _period_nav(cash_flows_df, periods)
+    if nav is not None:
+        adjusted_df['NAV'] = nav
+    for key in ["Facility Draw", "Facility Repayment", "Facility Balance", "Facility Interest", "Facility Fees"]:
+        adjusted_df[key.replace(' ', '_')] = schedule[key]
+    return adjusted_df
+
+
+def bridge_draws(lp_contributions, draw_fraction, hold_periods):
+    """
+    Builds the common "bridge every call" schedule for many scenarios at once: each capital call
+    is funded `draw_fraction` by the facility and repaid `hold_periods` periods (on the compact
+    index) later, or at the last period. draw_fraction and hold_periods are scalars or (n_scenarios,).
+
+    Returns (draws, repayments), each (n_scenarios, n_periods).
+    """
+    lp_contributions = np.asarray(lp_contributions, dtype=float)
+    draw_fraction, hold_periods = np.broadcast_arrays(np.atleast_1d(np.asarray(draw_fraction, dtype=float)),
+                                                      np.atleast_1d(np.asarray(hold_periods, dtype=int)))
+    n_scenarios, n_periods = len(draw_fraction), lp_contributions.shape[-1]
+
+    draws = draw_fraction[:, None] * lp_contributions
+    repay_at = np.minimum(np.arange(n_periods) + hold_periods[:, None], n_periods - 1)
+    flat_index = (np.arange(n_scenarios)[:, None] * n_periods + repay_at).ravel()
+    repayments = np.bincount(flat_index, weights=draws.ravel(), minlength=n_scenarios * n_periods)
+    return draws, repayments.reshape(n_scenarios, n_periods)
+
+
+def compare_facility_irr(
+        cash_flows_df,  # Base ledger, without the facility
+        model,  # "European" or "American"
+        lp_commitment,  # Same meaning as in the waterfall functions
+        preferred_return_pct,
+        gp_catch_up_pct,
+        carried_interest_gp_share_pct,
+        draws,  # (n_scenarios, n_periods) on the ledger's compact period index (see bridge_draws)
+        repayments,  # (n_scenarios, n_periods)
+        interest_rate_pct,  # Scalar or (n_scenarios,)
+        commitment_fee_pct=0.0,  # Scalar or (n_scenarios,)
+        facility_limit=None,  # Scalar or (n_scenarios,)
+        period_times=None  # How Period maps to time for interest and IRR, as in the waterfall functions
+):
+    """
+    LP returns with and without a subscription line, for many facility scenarios in one batched
+    waterfall pass: the base ledger and every adjusted ledger run through run_waterfall_batch
+    together, so only the final IRR solve is done per scenario.
+
+    Returns a DataFrame with one row per scenario: LP IRR and MOIC with the facility, the IRR
+    uplift over the base ledger (whose LP IRR/MOIC are repeated on every row for reference),
+    facility costs, peak balance, and GP catch-up + carry with and without the facility.
+    """
+    periods, lp_contributions, gp_contributions, proceeds = _aggregate_by_period(cash_flows_df)
+    times = resolve_period_times(periods, period_times)
+    schedule = facility_schedule(times, lp_contributions, np.atleast_2d(draws), np.atleast_2d(repayments),
+                                 interest_rate_pct, commitment_fee_pct, facility_limit)
+    n_scenarios = schedule["LP_Contribution"].shape[0]
+
+    # Case 0 is the ledger without the facility
+    all_lp_contributions = np.vstack([lp_contributions, schedule["LP_Contribution"]])
+    outputs = run_waterfall_batch(
+        model,
+        all_lp_contributions,
+        np.broadcast_to(gp_contributions, all_lp_contributions.shape),
+        np.broadcast_to(proceeds, all_lp_contributions.shape),
+        lp_commitment, preferred_return_pct, gp_catch_up_pct, carried_interest_gp_share_pct,
+    )
+
+    lp_distributions = outputs["LP Distributions"]
+    lp_irr_cash_flows = lp_distributions - all_lp_contributions
+    lp_irr = np.array([calculate_irr(flows, periods=times) for flows in lp_irr_cash_flows], dtype=float)
+    lp_moic = np.array([calculate_moic(d, c) for d, c in zip(lp_distributions.sum(axis=1),
+                                                              all_lp_contributions.sum(axis=1))])
+    gp_carry = outputs["GP Catch-up Profit Paid"][:, -1] + outputs["GP Carried Interest Paid"][:, -1]
+
+    return pd.DataFrame({
+        "Scenario": np.arange(n_scenarios),
+        "LP IRR Without Facility": lp_irr[0],
+        "LP IRR With Facility": lp_irr[1:],
+        "LP IRR Uplift": lp_irr[1:] - lp_irr[0],
+        "LP MOIC Without Facility": lp_moic[0],
+        "LP MOIC With Facility": lp_moic[1:],
+        "Facility Interest": schedule["Facility Interest"].sum(axis=1),
+        "Facility Fees": schedule["Facility Fees"].sum(axis=1),
+        "Peak Facility Balance": schedule["Facility Balance"].max(axis=1, initial=0.0),
+        "GP Carry Without Facility": gp_carry[0],
+        "GP Carry With Facility": gp_carry[1:],
+    })
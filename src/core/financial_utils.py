@@ -12,16 +12,128 @@ def calculate_moic(total_distributions, total_contributions):
     return total_distributions / total_contributions
 
 
-def calculate_irr(cash_flows):
+# Grid of x = ln(1 + r) used to bracket IRR roots for r in (-99.99%, 100000%), densest around zero
+_IRR_GRID_HALF = np.geomspace(1e-6, 1.0, 200)
+_IRR_GRID = np.concatenate([np.log(1e-4) * _IRR_GRID_HALF[::-1], [0.0], np.log(1e3) * _IRR_GRID_HALF])
+
+
+def _irr_grid(span):
+    """
+    _IRR_GRID extended towards zero at the same density, so that the first cell on either side
+    spans at most 1e-3 / span in x. The NPV of flows spread over `span` periods varies on a scale
+    of 1 / span near zero, so a wider first cell can hide a pair of roots or, for the running
+    IRR, a root its interpolant cannot resolve.
+    """
+    smallest = 1e-3 / (max(span, 1.0) * np.log(1e4))  # The negative side is the wider one
+    ratio = _IRR_GRID_HALF[1] / _IRR_GRID_HALF[0]
+    n_extra = max(0, int(np.ceil(np.log(_IRR_GRID_HALF[0] / smallest) / np.log(ratio))))
+    half = np.concatenate([_IRR_GRID_HALF[0] * ratio ** -np.arange(n_extra, 0, -1), _IRR_GRID_HALF])
+    return np.concatenate([np.log(1e-4) * half[::-1], [0.0], np.log(1e3) * half])
+
+
+# Beyond this many contiguous periods calculate_irr stops using numpy_financial.irr
+_NPF_IRR_MAX_PERIODS = 64
+
+
+def _scaled_npv(x, cf, t, with_derivative=False):
+    """
+    NPV of cf at times t for x = ln(1 + r), divided by the largest discount factor so that
+    large gaps between periods never overflow (the sign and the Newton step are unaffected).
+    """
+    exponents = -x * t
+    weights = np.exp(exponents - exponents.max())
+    if not with_derivative:
+        return (cf * weights).sum()
+    return (cf * weights).sum(), -(cf * t * weights).sum()
+
+
+def _closest_root_to_zero(signs, cf, t, grid, tol=1e-12, max_iter=200):
+    """
+    Given the sign of the NPV at every point of `grid` (see _irr_grid), refines each bracketed root (safeguarded
+    Newton) and returns the rate closest to zero, matching numpy_financial.irr's choice among
+    multiple roots.
+    """
+    roots = list(np.expm1(grid[signs == 0]))
+    brackets = np.nonzero(signs[:-1] * signs[1:] < 0)[0]
+    # Visit brackets nearest to zero first and stop once none can beat the best root found
+    nearest_rate = np.minimum(np.abs(np.expm1(grid[brackets])), np.abs(np.expm1(grid[brackets + 1])))
+    for i, bound in zip(brackets[np.argsort(nearest_rate)], np.sort(nearest_rate)):
+        if roots and bound > min(abs(r) for r in roots):
+            break
+        lo, hi, sign_lo = grid[i], grid[i + 1], signs[i]
+        x = 0.5 * (lo + hi)
+        step = step_before_last = hi - lo
+
+        # Newton, with a bisection step whenever Newton would leave the shrinking bracket or is not
+        # at least halving its step every other iteration. Over long spans the NPV behaves like
+        # exp(-x * t_max), on which plain Newton only creeps by about 1 / t_max per step.
+        for _ in range(max_iter):
+            npv, d_npv = _scaled_npv(x, cf, t, with_derivative=True)
+            if npv == 0:
+                break
+            if np.sign(npv) == sign_lo:
+                lo = x
+            else:
+                hi = x
+            newton_step = npv / d_npv if d_npv != 0 else np.inf
+            if lo < x - newton_step < hi and abs(2 * newton_step) <= abs(step_before_last):
+                step_before_last, step = step, newton_step
+                x_new = x - newton_step
+            else:
+                step_before_last, step = step, 0.5 * (hi - lo)
+                x_new = 0.5 * (lo + hi)
+            converged = abs(x_new - x) < tol or hi - lo < tol
+            x = x_new
+            if converged:
+                break
+        roots.append(np.expm1(x))
+
+    if not roots:
+        return None
+    return float(min(roots, key=abs))
+
+
+def _irr_from_times(cash_flows, times):
+    """
+    Solves sum(cf_i * (1 + r) ** -t_i) = 0 for r when cash flows sit at arbitrary (sorted) times,
+    without building the dense polynomial numpy_financial.irr would need for gapped periods.
+    """
+    cf = np.asarray(cash_flows, dtype=float)
+    t = np.asarray(times, dtype=float)
+    non_zero = cf != 0
+    cf, t = cf[non_zero], t[non_zero]
+    if cf.size < 2 or not (cf > 0).any() or not (cf < 0).any():
+        return None  # IRR needs at least one outflow and one inflow
+    t = t - t[0]
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        grid = _irr_grid(t[-1])
+        signs = np.sign([_scaled_npv(x, cf, t) for x in grid])
+        return _closest_root_to_zero(signs, cf, t, grid)
+
+
+def calculate_irr(cash_flows, periods=None):
     """
     Calculates the Internal Rate of Return for a series of cash flows.
     Cash flows should be a list or array where initial investments are negative
     and returns are positive.
     Example: [-100, 10, 20, 110]
+
+    If `periods` is given, cash_flows[i] occurs at periods[i] (sorted, possibly with gaps) and the
+    IRR is per unit of period. Only the actual cash-flow events are used, so a gap of thousands of
+    periods costs nothing.
     """
-    if not cash_flows or len(cash_flows) < 2:
+    if cash_flows is None or len(cash_flows) < 2:
         return None  # Not enough cash flows for IRR calculation
 
+    # npf.irr finds polynomial roots via an eigenvalue solve that is cubic in the number of
+    # periods, so long or gapped ledgers go through the bracketing solver instead
+    if len(cash_flows) > _NPF_IRR_MAX_PERIODS or (periods is not None and np.any(np.diff(periods) != 1)):
+        try:
+            return _irr_from_times(cash_flows, np.arange(len(cash_flows)) if periods is None else periods)
+        except Exception:
+            return None
+
     try:
         # numpy_financial.irr can sometimes fail for unusual cash flows;
         # you might want to add more sophisticated error handling or retries if needed.
@@ -34,6 +146,131 @@ def calculate_irr(cash_flows):
         return None
 
 
+
+def _hermite_roots(x_lo, x_hi, g_lo, g_hi, d1_lo, d1_hi, d2_lo, d2_hi, iterations=40):
+    """
+    Roots of the quintic Hermite interpolants matching g and its first two derivatives at x_lo
+    and x_hi, one per bracket (g_lo and g_hi of opposite signs), by safeguarded Newton on all
+    brackets at once.
+    """
+    h = x_hi - x_lo
+    m_lo, m_hi, q_lo, q_hi = d1_lo * h, d1_hi * h, d2_lo * h * h, d2_hi * h * h
+    # P(s) = sum(coefficients[k] * s ** k) on s in [0, 1]
+    coefficients = [
+        g_lo,
+        m_lo,
+        0.5 * q_lo,
+        -10 * g_lo - 6 * m_lo - 1.5 * q_lo + 0.5 * q_hi - 4 * m_hi + 10 * g_hi,
+        15 * g_lo + 8 * m_lo + 1.5 * q_lo - q_hi + 7 * m_hi - 15 * g_hi,
+        -6 * g_lo - 3 * m_lo - 0.5 * q_lo + 0.5 * q_hi - 3 * m_hi + 6 * g_hi,
+    ]
+    lo, hi = np.zeros_like(h), np.ones_like(h)
+    s = g_lo / (g_lo - g_hi)
+    for _ in range(iterations):
+        value, slope = coefficients[5], 0.0
+        for coefficient in coefficients[4::-1]:
+            slope = slope * s + value
+            value = value * s + coefficient
+        on_lo_side = np.sign(value) == np.sign(g_lo)
+        lo, hi = np.where(on_lo_side, s, lo), np.where(on_lo_side, hi, s)
+        s_new = s - value / slope
+        s_new = np.where((s_new > lo) & (s_new < hi), s_new, 0.5 * (lo + hi))
+        s = np.where(value == 0, s, s_new)
+    return x_lo + s * h
+
+
+def _nearest_bracket_roots(x, g, d1, d2):
+    """
+    For each row of g (NPV at the ascending grid x, starting at 0 and moving away from it) and
+    its first two derivatives d1 and d2, returns the root in the sign-change bracket nearest to
+    x[0] (NaN if there is none).
+    """
+    signs = np.sign(g)
+    candidates = np.zeros(g.shape, dtype=bool)
+    candidates[:, :-1] = (signs[:, :-1] == 0) | (signs[:, :-1] * signs[:, 1:] < 0)
+    candidates[:, -1] = signs[:, -1] == 0
+    found = candidates.any(axis=1)
+    k = np.minimum(np.argmax(candidates, axis=1), len(x) - 2)
+    rows = np.arange(len(g))
+
+    roots = _hermite_roots(x[k], x[k + 1], g[rows, k], g[rows, k + 1], d1[rows, k], d1[rows, k + 1],
+                           d2[rows, k], d2[rows, k + 1])
+    roots = np.where(signs[rows, k] == 0, x[k], roots)
+    roots = np.where(signs[rows, k + 1] == 0, x[k + 1], roots)  # Only reached when k is the last bracket
+    return np.where(found, roots, np.nan)
+
+
+def calculate_running_irr(cash_flows, periods=None, chunk_size=4096):
+    """
+    Returns the IRR of every prefix cash_flows[:i + 1] as an array (NaN where undefined), at a
+    bounded cost per period (O(grid), independent of how many periods came before):
+    - the NPV g(x) of the prefix and its first two derivatives are carried at every rate
+      x = ln(1 + r) of _irr_grid(span of the periods), as running sums: cumulative sums for
+      x >= 0 and, for x <= 0, decaying accumulators measured from the latest cash flow, so
+      nothing overflows;
+    - each prefix's IRR is the root, in the bracket nearest zero on either side, of the quintic
+      Hermite interpolant of g between two grid rates. Away from zero, the flows that dominate
+      g(x) are those within a few 1 / |x| of the latest one, so g varies on a scale of about |x|
+      there and a geometric grid keeps the interpolant about equally accurate at every rate; the
+      grid is extended towards zero until the first cell is narrow against 1 / span.
+    All prefixes of a chunk are solved together with array operations. Each value agrees with
+    calculate_irr on the same prefix up to the interpolation error (a few 1e-8 relative).
+    """
+    cf = np.asarray(cash_flows, dtype=float)
+    times = np.arange(len(cf), dtype=float) if periods is None else np.asarray(periods, dtype=float)
+    running_irr = np.full(len(cf), np.nan)
+    events = np.flatnonzero(cf)  # Zero flows do not move the IRR
+    if events.size == 0:
+        return running_irr
+
+    c = cf[events]
+    t = times[events] - times[events[0]]
+    grid = _irr_grid(t[-1])
+    x_pos = grid[grid >= 0]
+    x_neg = grid[grid <= 0][::-1]  # From 0 towards -inf, so both sides start at zero
+    decay_rate = -x_neg
+
+    event_irr = np.empty(len(c))
+    # x >= 0: sums of c * t ** m * exp(-x * t) for m = 0, 1, 2 (the m-th derivative is (-1) ** m times that)
+    pos_sums = np.zeros((3, x_pos.size))
+    # x <= 0: sums of c * (t_last - t) ** m * exp(-x * (t - t_last)) (the m-th derivative exactly)
+    neg_sum0, neg_sum1, neg_sum2 = np.zeros((3, x_neg.size))
+    t_last = 0.0
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore', under='ignore'):
+        for start in range(0, len(c), chunk_size):
+            c_chunk, t_chunk = c[start:start + chunk_size], t[start:start + chunk_size]
+
+            weighted = c_chunk[:, None] * np.exp(-np.outer(t_chunk, x_pos))
+            g_pos = pos_sums[0] + np.cumsum(weighted, axis=0)
+            d1_pos = -(pos_sums[1] + np.cumsum(weighted * t_chunk[:, None], axis=0))
+            d2_pos = pos_sums[2] + np.cumsum(weighted * (t_chunk * t_chunk)[:, None], axis=0)
+            pos_sums = np.array([g_pos[-1], -d1_pos[-1], d2_pos[-1]])
+
+            g_neg, d1_neg, d2_neg = np.empty((3, len(c_chunk), x_neg.size))
+            for i, (flow, time) in enumerate(zip(c_chunk.tolist(), t_chunk.tolist())):
+                elapsed = time - t_last
+                decay = np.exp(-decay_rate * elapsed)
+                neg_sum2 = (neg_sum2 + 2 * elapsed * neg_sum1 + elapsed * elapsed * neg_sum0) * decay
+                neg_sum1 = (neg_sum1 + elapsed * neg_sum0) * decay
+                neg_sum0 = neg_sum0 * decay + flow
+                g_neg[i], d1_neg[i], d2_neg[i] = neg_sum0, neg_sum1, neg_sum2
+                t_last = time
+
+            rate_pos = np.expm1(_nearest_bracket_roots(x_pos, g_pos, d1_pos, d2_pos))
+            # Mirror the negative side (x -> -x, flipping odd derivatives) so it is also searched outwards from zero
+            rate_neg = np.expm1(-_nearest_bracket_roots(-x_neg, g_neg, -d1_neg, d2_neg))
+            use_neg = np.isnan(rate_pos) | (np.abs(rate_neg) < np.abs(rate_pos))
+            event_irr[start:start + len(c_chunk)] = np.where(use_neg, rate_neg, rate_pos)
+
+    # Spread each event's IRR over the zero flows that follow it; a prefix needs both an outflow
+    # and an inflow before an IRR can exist
+    last_event = np.searchsorted(events, np.arange(len(cf)), side='right') - 1
+    has_event = last_event >= 0
+    running_irr[has_event] = event_irr[last_event[has_event]]
+    solvable = np.maximum.accumulate(cf > 0) & np.maximum.accumulate(cf < 0)
+    running_irr[~solvable] = np.nan
+    return running_irr
+
 if __name__ == '__main__':
     # Test MOIC
     moic1 = calculate_moic(total_distributions=150, total_contributions=100)
@@ -63,4 +300,8 @@ if __name__ == '__main__':
     cf5 = [-100]  # Only investment
     irr5 = calculate_irr(cf5)
     print(
-        f"Test IRR 5 (only investment): {irr5 * 100:.2f}%" if irr5 is not None else "Test IRR 5 (only investment): N/A")
\ No newline at end of file
+        f"Test IRR 5 (only investment): {irr5 * 100:.2f}%" if irr5 is not None else "Test IRR 5 (only investment): N/A")
+
+    cf6 = [-100, 121]  # Two periods apart with nothing in between
+    irr6 = calculate_irr(cf6, periods=[0, 2])
+    print(f"Test IRR 6 (gap in periods): {irr6 * 100:.2f}%" if irr6 is not None else "Test IRR 6: N/A")  # Expected: 10.00%
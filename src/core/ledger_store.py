@@ -0,0 +1,193 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['Period', 'LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds']
+AMOUNT_COLUMNS = ['LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds']
+NAV_COLUMN = 'NAV'  # Optional; reported NAV for hypothetical-liquidation carry accrual (may be blank)
+
+# Cache location can be overridden (e.g. to a shared volume used by several workers)
+DEFAULT_CACHE_DIR = os.environ.get("PE_WATERFALL_LEDGER_CACHE", os.path.join(os.getcwd(), ".ledger_cache"))
+# Least recently used entries are evicted once the cache grows beyond this many bytes
+MAX_CACHE_BYTES = int(os.environ.get("PE_WATERFALL_LEDGER_CACHE_MAX_BYTES", 1024 ** 3))
+
+# Bump whenever the files written by _write_cache_entry change (2: optional nav.npy). Entries live
+# under a per-version directory, so entries in an older format are never served and get evicted.
+CACHE_FORMAT_VERSION = 2
+
+_PERIOD_FILE = "period.npy"
+_AMOUNTS_FILE = "amounts.npy"
+_NAV_FILE = "nav.npy"
+_STALE_ENTRY_NAME = re.compile(r"v\d+|[0-9a-f]{64}")
+
+
+def validate_cash_flows(cash_flows_df):
+    """
+    Checks that a cash flow DataFrame has the columns the waterfall engines expect
+    and that every one of them is numeric. Raises ValueError otherwise.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in cash_flows_df.columns]
+    if missing:
+        raise ValueError(f"Cash flow data is missing required columns: {', '.join(missing)}")
+
+    non_numeric = [col for col in REQUIRED_COLUMNS if not pd.api.types.is_numeric_dtype(cash_flows_df[col])]
+    if non_numeric:
+        raise ValueError(f"Cash flow columns must be numeric: {', '.join(non_numeric)}")
+
+    if cash_flows_df[REQUIRED_COLUMNS].isna().any().any():
+        raise ValueError("Cash flow data contains missing values.")
+
+    if NAV_COLUMN in cash_flows_df.columns and not pd.api.types.is_numeric_dtype(cash_flows_df[NAV_COLUMN]):
+        raise ValueError(f"Cash flow column must be numeric: {NAV_COLUMN}")
+
+    return cash_flows_df
+
+
+def _read_source_bytes(source):
+    """Returns the raw bytes of a path, bytes object or file-like (e.g. a Streamlit UploadedFile)."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    data = source.read()
+    return data.encode() if isinstance(data, str) else data
+
+
+def ledger_key(data):
+    """Content hash used to key cached ledgers; identical CSV bytes always map to the same entry."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _entry_size(entry_dir):
+    return sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+
+
+def _remove_cache_entry(path):
+    """
+    Renames the entry out of place before deleting it, so concurrent readers see the whole entry
+    disappear at once rather than file by file (a missing nav.npy must mean "no NAV").
+    """
+    trash_dir = os.path.join(os.path.dirname(path), f".tmp-evicted-{os.getpid()}-{os.path.basename(path)}")
+    try:
+        os.rename(path, trash_dir)
+    except OSError:
+        return  # Evicted concurrently
+    shutil.rmtree(trash_dir, ignore_errors=True)
+
+
+def _evict_cache_entries(cache_dir, max_bytes, keep=None):
+    """
+    Removes entries written in an older format, then least recently used entries (by directory
+    mtime, refreshed on every load) until the cache fits in max_bytes. `keep` is never removed.
+    Memory maps already opened on a removed entry stay valid until they are closed.
+    """
+    current_dir = os.path.join(cache_dir, f"v{CACHE_FORMAT_VERSION}")
+    for name in os.listdir(cache_dir):
+        # Older versions, and unversioned entries written before CACHE_FORMAT_VERSION existed;
+        # anything else in the directory is left alone
+        if _STALE_ENTRY_NAME.fullmatch(name) and name != os.path.basename(current_dir):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+    entries = []
+    for name in os.listdir(current_dir):
+        path = os.path.join(current_dir, name)
+        if name.startswith(".tmp-") or not os.path.isdir(path):
+            continue
+        try:
+            entries.append((os.path.getmtime(path), _entry_size(path), path))
+        except FileNotFoundError:
+            continue  # Evicted concurrently
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        if path != keep:
+            _remove_cache_entry(path)
+            total_bytes -= size
+
+
+def _write_cache_entry(cash_flows_df, entry_dir):
+    """
+    Writes the validated ledger as .npy files. Files are written to a temporary directory
+    and renamed into place so concurrent workers never observe a half-written entry.
+    """
+    parent_dir = os.path.dirname(entry_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent_dir, prefix=".tmp-")
+
+    np.save(os.path.join(tmp_dir, _PERIOD_FILE), cash_flows_df['Period'].to_numpy())
+    np.save(os.path.join(tmp_dir, _AMOUNTS_FILE),
+            np.ascontiguousarray(cash_flows_df[AMOUNT_COLUMNS].to_numpy(dtype=np.float64)))
+    if NAV_COLUMN in cash_flows_df.columns:
+        np.save(os.path.join(tmp_dir, _NAV_FILE), cash_flows_df[NAV_COLUMN].to_numpy(dtype=np.float64))
+
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # Another process cached the same ledger first; its entry is identical, so discard ours
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _open_cache_entry(entry_dir):
+    """
+    Memory-maps the arrays of a cache entry and marks it as recently used. Raises FileNotFoundError
+    if another worker evicts the entry while it is being opened.
+    """
+    os.utime(entry_dir)  # Mark as recently used for eviction
+    periods = np.load(os.path.join(entry_dir, _PERIOD_FILE), mmap_mode='r')
+    amounts = np.load(os.path.join(entry_dir, _AMOUNTS_FILE), mmap_mode='r')
+    nav_path = os.path.join(entry_dir, _NAV_FILE)
+    nav = np.load(nav_path, mmap_mode='r') if os.path.exists(nav_path) else None
+    if nav is None and not os.path.isdir(entry_dir):
+        raise FileNotFoundError(f"Ledger cache entry was evicted while loading: {entry_dir}")
+    return periods, amounts, nav
+
+
+def load_ledger_arrays(source, cache_dir=None):
+    """
+    Returns the ledger as memory-mapped NumPy arrays: ``(periods, amounts, nav)`` where ``amounts``
+    has one column per entry of AMOUNT_COLUMNS and ``nav`` is None if the CSV has no NAV column.
+    Entries are keyed by CACHE_FORMAT_VERSION and content hash; writing a new entry evicts the least
+    recently used ones beyond MAX_CACHE_BYTES.
+
+    The CSV is parsed and validated only the first time a given content is seen; after that the
+    arrays are opened read-only with ``mmap_mode='r'``, so loading is near-instant and processes
+    opening the same ledger share the OS page cache instead of holding private copies.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    data = _read_source_bytes(source)
+    entry_dir = os.path.join(cache_dir, f"v{CACHE_FORMAT_VERSION}", ledger_key(data))
+
+    if os.path.isdir(entry_dir):
+        try:
+            return _open_cache_entry(entry_dir)
+        except FileNotFoundError:
+            pass  # Evicted by another worker after the check; rebuild it below
+
+    cash_flows_df = validate_cash_flows(pd.read_csv(io.BytesIO(data)))
+    _write_cache_entry(cash_flows_df, entry_dir)
+    _evict_cache_entries(cache_dir, MAX_CACHE_BYTES, keep=entry_dir)
+    return _open_cache_entry(entry_dir)
+
+
+def load_ledger(source, cache_dir=None):
+    """
+    Loads a cash flow ledger (path, bytes or uploaded file) through the binary cache and returns
+    a DataFrame with the REQUIRED_COLUMNS (plus NAV when present). The amount columns are views over
+    the memory-mapped cache files, so ``df[col].to_numpy()`` in the engines does not copy the data.
+    """
+    periods, amounts, nav = load_ledger_arrays(source, cache_dir=cache_dir)
+    cash_flows_df = pd.DataFrame(amounts, columns=AMOUNT_COLUMNS, copy=False)
+    cash_flows_df.insert(0, 'Period', periods)
+    if nav is not None:
+        cash_flows_df[NAV_COLUMN] = nav
+    return cash_flows_df
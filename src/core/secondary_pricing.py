@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from .batch_waterfall import run_waterfall_batch
+from .waterfall_logic import _aggregate_by_period, _allocate_tiers, _period_nav, resolve_period_times
+
+# Percentiles of price-to-NAV across scenarios reported on the pricing curve
+CURVE_PERCENTILES = [10, 50, 90]
+
+
+def scale_future_proceeds(
+        proceeds,  # (n_periods,) gross fund proceeds on the ledger's compact period index
+        future_mask,  # (n_periods,) bool; True for projected periods (after the valuation date)
+        exit_multiples  # (n_scenarios,) multiplier applied to every projected proceed in a scenario
+):
+    """
+    Builds a (n_scenarios, n_periods) proceeds matrix in which realized proceeds are kept and
+    the projected ones are scaled by each scenario's exit multiple.
+    """
+    proceeds = np.asarray(proceeds, dtype=float)
+    exit_multiples = np.atleast_1d(np.asarray(exit_multiples, dtype=float))
+    return proceeds * np.where(future_mask, exit_multiples[:, None], 1.0)
+
+
+def price_lp_interest(
+        cash_flows_df,  # Ledger with actuals up to the valuation date and projected flows after it
+        proceeds_scenarios,  # (n_scenarios, n_periods) gross proceeds per scenario on the compact period index
+        model,  # "European" or "American"
+        lp_commitment,  # Same meaning as in the waterfall functions
+        preferred_return_pct,
+        gp_catch_up_pct,
+        carried_interest_gp_share_pct,
+        discount_rates,  # (n_rates,) buyer's required return per period step (see period_times)
+        valuation_period,  # Period at which the LP interest changes hands; must be one of the ledger's periods
+        fund_nav=None,  # Gross fund NAV at valuation_period; defaults to the ledger's NAV there
+        lp_nav=None,  # Scalar or (n_scenarios,) NAV the price is quoted against; overrides the LP share of fund_nav
+        period_times=None  # How Period maps to time for discounting, as in the waterfall functions
+):
+    """
+    Prices an LP interest for a secondary sale by discounting what the buyer receives after the
+    valuation date: the LP's waterfall distributions less the capital the LP is still called for.
+
+    Every proceeds scenario is run through the waterfall in one batched pass (the whole ledger is
+    run, so pref, catch-up and carry reflect the history up to the sale). Future net LP flows are
+    then valued at every discount rate at once as a single (n_scenarios, n_periods) by
+    (n_periods, n_rates) product with the discount factors (1 + r) ** -(time - valuation time), with
+    times from waterfall_logic.resolve_period_times.
+
+    Prices are quoted against the LP's NAV: the LP's share of a hypothetical liquidation in which
+    fund_nav (gross, split between LP and GP) is distributed through the tiers right after the
+    valuation period, from each scenario's waterfall state then, as for the accrued carry in the
+    per-period states. Pass lp_nav to quote against another base.
+
+    Returns a dict with 'discount_rates', 'fund_nav', 'lp_nav' ((n_scenarios,)), 'npv' and
+    'price_to_nav' ((n_scenarios, n_rates) arrays) and 'curve', a DataFrame with one row per
+    discount rate: the mean and the CURVE_PERCENTILES of price-to-NAV across scenarios. Raises
+    ValueError for invalid inputs.
+    """
+    periods, lp_contributions, gp_contributions, _ = _aggregate_by_period(cash_flows_df)
+    proceeds_scenarios = np.atleast_2d(np.asarray(proceeds_scenarios, dtype=float))
+    if proceeds_scenarios.shape[1] != len(periods):
+        raise ValueError(f"Proceeds scenarios have {proceeds_scenarios.shape[1]} periods; "
+                         f"the ledger has {len(periods)}.")
+
+    at_valuation = periods == valuation_period
+    if not at_valuation.any():
+        raise ValueError(f"Valuation period {valuation_period} is not one of the ledger's periods.")
+
+    discount_rates = np.atleast_1d(np.asarray(discount_rates, dtype=float))
+    if (discount_rates <= -1).any():
+        raise ValueError("Discount rates must be greater than -100%.")
+
+    shape = proceeds_scenarios.shape
+    outputs = run_waterfall_batch(
+        model,
+        np.broadcast_to(lp_contributions, shape),
+        np.broadcast_to(gp_contributions, shape),
+        proceeds_scenarios,
+        lp_commitment, preferred_return_pct, gp_catch_up_pct, carried_interest_gp_share_pct,
+    )
+
+    if lp_nav is None:
+        if fund_nav is None:
+            ledger_nav = _period_nav(cash_flows_df, periods)
+            if ledger_nav is None or np.isnan(ledger_nav[at_valuation][0]):
+                raise ValueError(f"No NAV reported at period {valuation_period}; pass fund_nav explicitly.")
+            fund_nav = float(ledger_nav[at_valuation][0])
+        v = np.flatnonzero(at_valuation)[0]
+        lp_capital, _, lp_pref, _, lp_split, _ = _allocate_tiers(
+            fund_nav,
+            outputs["LP Unreturned Capital"][:, v],
+            outputs["GP Unreturned Capital"][:, v],
+            outputs["LP Preferred Return Unpaid"][:, v],
+            outputs["LP Preferred Return Paid"][:, v],
+            outputs["GP Catch-up Profit Paid"][:, v],
+            gp_catch_up_pct, carried_interest_gp_share_pct,
+        )
+        lp_nav = lp_capital + lp_pref + lp_split
+    lp_nav = np.broadcast_to(np.asarray(lp_nav, dtype=float), (shape[0],))
+    if (lp_nav <= 0).any():
+        raise ValueError("LP NAV must be positive to quote a price-to-NAV.")
+
+    # The buyer receives flows strictly after the valuation period
+    future = periods > valuation_period
+    future_flows = outputs["LP Distributions"][:, future] - lp_contributions[future]
+    times = resolve_period_times(periods, period_times)
+    time_out = times[future] - times[at_valuation][0]
+    discount_factors = (1.0 + discount_rates[None, :]) ** -time_out[:, None]  # (n_future_periods, n_rates)
+
+    npv = future_flows @ discount_factors
+    price_to_nav = npv / lp_nav[:, None]
+
+    curve = pd.DataFrame({"Discount Rate": discount_rates, "Mean Price to NAV": price_to_nav.mean(axis=0)})
+    for q, values in zip(CURVE_PERCENTILES, np.percentile(price_to_nav, CURVE_PERCENTILES, axis=0)):
+        curve[f"P{q} Price to NAV"] = values
+
+    return {
+        "discount_rates": discount_rates,
+        "fund_nav": fund_nav,
+        "lp_nav": lp_nav,
+        "npv": npv,
+        "price_to_nav": price_to_nav,
+        "curve": curve,
+    }
@@ -1,4 +1,160 @@
-from .financial_utils import calculate_irr, calculate_moic
+import numpy as np
+import pandas as pd
+
+from .financial_utils import calculate_irr, calculate_moic, calculate_running_irr
+
+# State recorded at the end of every period when include_period_states=True
+_PERIOD_STATE_COLUMNS = [
+    "LP Unreturned Capital",
+    "GP Unreturned Capital",
+    "LP Preferred Return Paid",
+    "LP Preferred Return Unpaid",
+    "GP Catch-up Profit Paid",
+    "GP Carried Interest Paid",
+]
+
+
+def _aggregate_by_period(cash_flows_df):
+    """
+    Maps the ledger onto a compact, sorted index of the periods that actually occur.
+    Duplicate periods are summed, so the engines work on one entry per cash-flow event and
+    never allocate anything proportional to the largest Period value (e.g. YYYYQ or day offsets).
+
+    Returns (periods, lp_contributions, gp_contributions, proceeds) as NumPy arrays.
+    """
+    period_values = cash_flows_df['Period'].to_numpy()
+    amounts = [cash_flows_df[col].to_numpy(dtype=float)
+               for col in ('LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds')]
+
+    if period_values.size and np.all(period_values[1:] > period_values[:-1]):
+        return (period_values, *amounts)  # Already sorted and unique: no copy needed
+
+    periods, codes = np.unique(period_values, return_inverse=True)
+    return (periods, *[np.bincount(codes, weights=a, minlength=len(periods)) for a in amounts])
+
+
+def yyyyq_to_quarters(periods):
+    """Decodes YYYYQ period codes (e.g. 20241 for 2024 Q1) into a running count of quarters."""
+    year, quarter = np.divmod(np.asarray(periods).astype(np.int64), 10)
+    if ((quarter < 1) | (quarter > 4)).any():
+        raise ValueError("YYYYQ period codes must end in a quarter digit from 1 to 4.")
+    return year * 4 + (quarter - 1)
+
+
+def resolve_period_times(periods, period_times=None):
+    """
+    Returns the time of each of the sorted, unique `periods`, in the unit IRRs (and any other rate
+    quoted per period) are expressed in:
+    - None: the position on the compact period index, i.e. one step per reported period. This is
+      the default and matches a per-row IRR for ledgers with one row per period.
+    - "period": the Period values themselves, so gaps count as elapsed periods (month numbers,
+      day offsets, ...).
+    - "yyyyq": YYYYQ quarter codes (see yyyyq_to_quarters), so 20234 -> 20241 is one quarter.
+    - a function mapping the periods array to times.
+    """
+    if period_times is None:
+        return np.arange(len(periods), dtype=float)
+    if callable(period_times):
+        return np.asarray(period_times(periods), dtype=float)
+    if period_times == "period":
+        return np.asarray(periods, dtype=float)
+    if period_times == "yyyyq":
+        return yyyyq_to_quarters(periods).astype(float)
+    raise ValueError(f"Unknown period_times: {period_times!r}")
+
+
+def _period_nav(cash_flows_df, periods):
+    """
+    Returns the optional 'NAV' column on the compact period index, or None if the ledger has none.
+    NAV is a balance rather than a flow, so the last value reported for a period is kept; periods
+    without a NAV (non-reporting dates) are NaN.
+    """
+    if 'NAV' not in cash_flows_df.columns:
+        return None
+    codes = np.searchsorted(periods, cash_flows_df['Period'].to_numpy())
+    nav = np.full(len(periods), np.nan)
+    reported = ~np.isnan(cash_flows_df['NAV'].to_numpy(dtype=float))
+    nav[codes[reported]] = cash_flows_df['NAV'].to_numpy(dtype=float)[reported]  # Last write wins
+    return nav
+
+
+def _allocate_tiers(available, lp_capital_remaining, gp_capital_remaining, pref_remaining, lp_pref_paid,
+                    gp_catch_up_paid, gp_catch_up_pct, carried_interest_gp_share_pct):
+    """
+    Vectorized form of one pass through the five distribution tiers used by both engines.
+    Every argument may be a scalar or an array (broadcast together), so the same step can be
+    applied to many funds, scenarios or reporting dates at once. Balances are the state before
+    the distribution; lp_pref_paid and gp_catch_up_paid are cumulative amounts already paid.
+
+    Returns (lp_capital, gp_capital, lp_pref, gp_catch_up, lp_final_split, gp_final_split) payments.
+    """
+    available = np.maximum(available, 0.0)  # Non-positive proceeds distribute nothing
+
+    # Tier 1 / Tier 2: Return LP then GP capital
+    lp_capital = np.minimum(available, np.maximum(lp_capital_remaining, 0.0))
+    available = available - lp_capital
+    gp_capital = np.minimum(available, np.maximum(gp_capital_remaining, 0.0))
+    available = available - gp_capital
+
+    # Tier 3: LP preferred return
+    lp_pref = np.minimum(available, np.maximum(pref_remaining, 0.0))
+    available = available - lp_pref
+
+    # Tier 4: GP catch-up towards carried_interest_gp_share_pct of (pref + GP profit)
+    carry = np.asarray(carried_interest_gp_share_pct, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        target_gp_profit_for_catchup = np.where(
+            1 - carry > 0, (lp_pref_paid + lp_pref) / (1 - carry) * carry, np.inf)
+    payment_needed_for_catchup = np.where(
+        carry > 0, np.maximum(target_gp_profit_for_catchup - gp_catch_up_paid, 0.0), 0.0)
+    gp_catch_up = np.minimum(available * gp_catch_up_pct, payment_needed_for_catchup)
+    available = available - gp_catch_up
+
+    # Tier 5: Final split
+    return lp_capital, gp_capital, lp_pref, gp_catch_up, available * (1 - carry), available * carry
+
+
+def _hypothetical_liquidation_carry(nav, states_df, gp_catch_up_pct, carried_interest_gp_share_pct):
+    """
+    GP catch-up + carry that would be paid if `nav` were distributed at the end of each period,
+    starting from the recorded state. Evaluated for every period at once.
+    """
+    tiers = _allocate_tiers(
+        nav,
+        states_df["LP Unreturned Capital"].to_numpy(),
+        states_df["GP Unreturned Capital"].to_numpy(),
+        states_df["LP Preferred Return Unpaid"].to_numpy(),
+        states_df["LP Preferred Return Paid"].to_numpy(),
+        states_df["GP Catch-up Profit Paid"].to_numpy(),
+        gp_catch_up_pct,
+        carried_interest_gp_share_pct,
+    )
+    return tiers[3] + tiers[5]
+
+
+def _period_states_frame(periods, times, period_states, lp_distributions_by_period, gp_distributions_by_period,
+                         lp_irr_cash_flows, gp_irr_cash_flows, nav=None, gp_catch_up_pct=None,
+                         carried_interest_gp_share_pct=None):
+    """
+    Assembles the per-period state trajectory recorded during the waterfall loop into a
+    DataFrame (one row per distinct period) that can be charted directly. With a NAV series,
+    the accrued carry under a hypothetical liquidation at each period end is added.
+    """
+    states_df = pd.DataFrame(period_states, columns=_PERIOD_STATE_COLUMNS)
+    states_df.insert(0, "Period", periods)
+    states_df.insert(1, "LP Cumulative Distributions", np.cumsum(lp_distributions_by_period))
+    states_df.insert(2, "GP Cumulative Distributions", np.cumsum(gp_distributions_by_period))
+    states_df["GP Carry To Date (Catch-up + Carry)"] = (
+            states_df["GP Catch-up Profit Paid"] + states_df["GP Carried Interest Paid"])
+    states_df["LP Interim IRR"] = calculate_running_irr(lp_irr_cash_flows, times)
+    states_df["GP Interim IRR"] = calculate_running_irr(gp_irr_cash_flows, times)
+    if nav is not None:
+        states_df["NAV"] = nav
+        states_df["Hypothetical Liquidation Carry"] = _hypothetical_liquidation_carry(
+            nav, states_df, gp_catch_up_pct, carried_interest_gp_share_pct)
+        states_df["GP Accrued Carry"] = (
+                states_df["GP Carry To Date (Catch-up + Carry)"] + states_df["Hypothetical Liquidation Carry"])
+    return states_df
 
 
 def calculate_european_waterfall(
@@ -6,18 +162,28 @@ def calculate_european_waterfall(
         preferred_return_pct,  # Annual preferred return (e.g., 0.08 for 8%)
         gp_catch_up_pct,  # GP catch-up proportion (e.g., 1.0 for 100%)
         carried_interest_gp_share_pct,  # GP's share in final split (e.g., 0.20 for 20%)
-        cash_flows_df  # DataFrame with 'Period', 'LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds'
+        cash_flows_df,  # DataFrame with 'Period', 'LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds'
+        include_period_states=False,  # If True, results["period_states"] holds the state after every period
+        period_times=None  # How Period maps to time for IRR; None = one step per reported period (see resolve_period_times)
 ):
     """
     Calculates distributions for a simplified European (Whole Fund) waterfall.
     Assumes preferred return is simple (not compounded) and calculated on total LP capital committed/called,
     paid after all LP capital is returned.
+    Periods are processed in sorted order and rows sharing a Period are aggregated; Period values
+    may be non-contiguous (e.g. YYYYQ or day offsets). IRR is per period step by default; pass
+    period_times ("yyyyq", "period" or a function) to measure it in quarters or raw Period units.
+    With include_period_states, the position at the end of every period (cumulative distributions,
+    unreturned capital, pref paid/unpaid, carry to date, interim IRRs) is recorded in the same pass.
+    If the ledger has a 'NAV' column, the states also include the carry accrued under a hypothetical
+    liquidation of that NAV at each period end.
     """
-    num_periods = len(cash_flows_df)
+    periods, lp_contributions, gp_contributions, proceeds = _aggregate_by_period(cash_flows_df)
+    num_periods = len(periods)  # Number of distinct periods, not the largest Period value
 
     # Initialize tracking variables
-    total_lp_capital_called = cash_flows_df['LP_Contribution'].sum()
-    total_gp_capital_called = cash_flows_df['GP_Contribution'].sum()
+    total_lp_capital_called = float(lp_contributions.sum())
+    total_gp_capital_called = float(gp_contributions.sum())
 
     lp_capital_returned = 0
     gp_capital_returned = 0
@@ -29,6 +195,7 @@ def calculate_european_waterfall(
     # Store distributions per period for LP and GP (for IRR calculation)
     lp_distributions_by_period = [0.0] * num_periods
     gp_distributions_by_period = [0.0] * num_periods
+    period_states = []
 
     # --- Simplified Preferred Return Calculation ---
     # Total preferred return due to LPs over the fund life before GP catch-up/carry.
@@ -39,9 +206,8 @@ def calculate_european_waterfall(
     # total_lp_pref_due = total_lp_capital_called * preferred_return_pct * avg_fund_life_years
     # For this example, we'll treat preferred_return_pct as the total hurdle percentage.
 
-    for index, row in cash_flows_df.iterrows():
-        period = row['Period']  # For assigning distributions to the correct period index
-        available_for_distribution = row['Gross_Fund_Proceeds']
+    for period, available_for_distribution in enumerate(proceeds.tolist()):
+        # `period` is the position in the compact period index
 
         # Tier 1: Return LP Capital
         if available_for_distribution > 0 and lp_capital_returned < total_lp_capital_called:
@@ -98,21 +264,27 @@ def calculate_european_waterfall(
             gp_carried_interest_paid += gp_share_final_split  # This is the actual carry from this tier
             available_for_distribution = 0  # All distributed
 
-    # --- Prepare IRR Cash Flows ---
-    lp_irr_cash_flows = [-cf for cf in cash_flows_df['LP_Contribution']]
-    for p in range(num_periods):
-        lp_irr_cash_flows[p] += lp_distributions_by_period[p]
+        if include_period_states:
+            period_states.append((
+                total_lp_capital_called - lp_capital_returned,
+                total_gp_capital_called - gp_capital_returned,
+                lp_pref_paid,
+                total_lp_pref_due - lp_pref_paid,
+                gp_catch_up_profit_paid,
+                gp_carried_interest_paid,
+            ))
 
-    gp_irr_cash_flows = [-cf for cf in cash_flows_df['GP_Contribution']]
-    for p in range(num_periods):
-        gp_irr_cash_flows[p] += gp_distributions_by_period[p]
+    # --- Prepare IRR Cash Flows ---
+    lp_irr_cash_flows = np.asarray(lp_distributions_by_period) - lp_contributions
+    gp_irr_cash_flows = np.asarray(gp_distributions_by_period) - gp_contributions
 
     # --- Calculate Metrics ---
     total_lp_distributions_received = sum(lp_distributions_by_period)
     total_gp_distributions_received = sum(gp_distributions_by_period)
 
-    lp_irr = calculate_irr(lp_irr_cash_flows)
-    gp_irr = calculate_irr(gp_irr_cash_flows)
+    times = resolve_period_times(periods, period_times)
+    lp_irr = calculate_irr(lp_irr_cash_flows, periods=times)
+    gp_irr = calculate_irr(gp_irr_cash_flows, periods=times)
     lp_moic = calculate_moic(total_lp_distributions_received, total_lp_capital_called)
     gp_moic = calculate_moic(total_gp_distributions_received, total_gp_capital_called)
 
@@ -141,6 +313,11 @@ def calculate_european_waterfall(
         },
         
     }
+    if include_period_states:
+        results["period_states"] = _period_states_frame(
+            periods, times, period_states, lp_distributions_by_period, gp_distributions_by_period,
+            lp_irr_cash_flows, gp_irr_cash_flows, nav=_period_nav(cash_flows_df, periods),
+            gp_catch_up_pct=gp_catch_up_pct, carried_interest_gp_share_pct=carried_interest_gp_share_pct)
     return results
 
 
@@ -149,7 +326,9 @@ def calculate_american_waterfall(
         preferred_return_pct,  # Preferred return per period (simple, non-compounded here)
         gp_catch_up_pct,  # GP catch-up proportion (1.0 means 100% of cash during catch-up)
         carried_interest_gp_share_pct,  # GP share of residual profits (e.g., 0.20 for 20%)
-        cash_flows_df  # DataFrame with 'Period', 'LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds'
+        cash_flows_df,  # DataFrame with 'Period', 'LP_Contribution', 'GP_Contribution', 'Gross_Fund_Proceeds'
+        include_period_states=False,  # If True, results["period_states"] holds the state after every period
+        period_times=None  # How Period maps to time for IRR; None = one step per reported period (see resolve_period_times)
 ):
     """
     Simplified American (deal-by-deal style) waterfall.
@@ -160,17 +339,21 @@ def calculate_american_waterfall(
     - Catch-up pays GP until GP profits equal the carried interest share of profits post-pref.
     - Remaining cash is split pro rata by carry.
     - No recycling/reinvestment mechanics; proceeds first repay capital, then pref, then carry.
+    - Rows sharing a Period are aggregated; Period values may have gaps, and pref accrues once
+      per reported period. IRR is per period step unless period_times says otherwise.
+    - With include_period_states, the state at the end of every period is recorded in the same pass,
+      plus hypothetical-liquidation accrued carry when the ledger has a 'NAV' column.
     """
 
     if cash_flows_df.empty:
         return {"error": "Cash flow data is empty."}
 
-    max_period = int(cash_flows_df['Period'].max())
-    num_periods = max_period + 1
+    periods, lp_contributions, gp_contributions, proceeds = _aggregate_by_period(cash_flows_df)
+    num_periods = len(periods)  # Number of distinct periods, not the largest Period value
 
     # Aggregate totals
-    total_lp_capital_called = cash_flows_df['LP_Contribution'].sum()
-    total_gp_capital_called = cash_flows_df['GP_Contribution'].sum()
+    total_lp_capital_called = float(lp_contributions.sum())
+    total_gp_capital_called = float(gp_contributions.sum())
 
     # Tracking balances
     outstanding_lp_capital = 0.0
@@ -184,22 +367,13 @@ def calculate_american_waterfall(
 
     lp_distributions_by_period = [0.0] * num_periods
     gp_distributions_by_period = [0.0] * num_periods
+    period_states = []
 
-    # Prepare IRR cash flow arrays indexed by period
-    lp_irr_cash_flows = [0.0] * num_periods
-    gp_irr_cash_flows = [0.0] * num_periods
-
-    # Iterate chronologically by reported period
-    for _, row in cash_flows_df.sort_values('Period').iterrows():
-        period = int(row['Period'])
-        lp_contribution = float(row['LP_Contribution'])
-        gp_contribution = float(row['GP_Contribution'])
-        available_for_distribution = float(row['Gross_Fund_Proceeds'])
-
-        # Record contributions for IRR and update outstanding capital
-        lp_irr_cash_flows[period] -= lp_contribution
-        gp_irr_cash_flows[period] -= gp_contribution
+    # Iterate chronologically over the compact period index
+    for period, (lp_contribution, gp_contribution, available_for_distribution) in enumerate(
+            zip(lp_contributions.tolist(), gp_contributions.tolist(), proceeds.tolist())):
 
+        # Update outstanding capital
         outstanding_lp_capital += lp_contribution
         outstanding_gp_capital += gp_contribution
 
@@ -254,16 +428,26 @@ def calculate_american_waterfall(
 
             available_for_distribution = 0.0
 
-    # Add distributions to IRR cash flows
-    for p in range(num_periods):
-        lp_irr_cash_flows[p] += lp_distributions_by_period[p]
-        gp_irr_cash_flows[p] += gp_distributions_by_period[p]
+        if include_period_states:
+            period_states.append((
+                outstanding_lp_capital,
+                outstanding_gp_capital,
+                lp_pref_paid,
+                pref_accrued,
+                gp_catch_up_profit_paid,
+                gp_carried_interest_paid,
+            ))
+
+    # Net contributions against distributions for IRR; gaps between periods are handled by calculate_irr
+    lp_irr_cash_flows = np.asarray(lp_distributions_by_period) - lp_contributions
+    gp_irr_cash_flows = np.asarray(gp_distributions_by_period) - gp_contributions
 
     total_lp_distributions_received = sum(lp_distributions_by_period)
     total_gp_distributions_received = sum(gp_distributions_by_period)
 
-    lp_irr = calculate_irr(lp_irr_cash_flows)
-    gp_irr = calculate_irr(gp_irr_cash_flows)
+    times = resolve_period_times(periods, period_times)
+    lp_irr = calculate_irr(lp_irr_cash_flows, periods=times)
+    gp_irr = calculate_irr(gp_irr_cash_flows, periods=times)
     lp_moic = calculate_moic(total_lp_distributions_received, total_lp_capital_called)
     gp_moic = calculate_moic(total_gp_distributions_received, total_gp_capital_called)
 
@@ -293,5 +477,10 @@ def calculate_american_waterfall(
             "Outstanding GP Capital": outstanding_gp_capital,
         },
     }
+    if include_period_states:
+        results["period_states"] = _period_states_frame(
+            periods, times, period_states, lp_distributions_by_period, gp_distributions_by_period,
+            lp_irr_cash_flows, gp_irr_cash_flows, nav=_period_nav(cash_flows_df, periods),
+            gp_catch_up_pct=gp_catch_up_pct, carried_interest_gp_share_pct=carried_interest_gp_share_pct)
 
     return results
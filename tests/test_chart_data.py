@@ -0,0 +1,70 @@
+"""Server-side chart aggregation, downsampling and pagination."""
+import numpy as np
+import pandas as pd
+
+from src.core.chart_data import bucket_periods, downsample_series, lttb_indices, paginate
+
+
+def states_frame(periods):
+    n = len(periods)
+    return pd.DataFrame({"Period": periods, "Distribution": np.ones(n), "Cumulative": np.arange(1.0, n + 1)})
+
+
+def test_buckets_follow_position_by_default():
+    """Gapped or coded periods are bucketed by their position on the ledger, not by their value."""
+    buckets = bucket_periods(states_frame([20233, 20234, 20241, 20242, 20243]), 2, flow_columns=["Distribution"])
+    assert buckets["Period"].tolist() == [20233, 20241, 20243]
+    assert buckets["Distribution"].tolist() == [2.0, 2.0, 1.0]
+    assert buckets["Cumulative"].tolist() == [2.0, 4.0, 5.0]
+
+
+def test_yyyyq_buckets_are_calendar_years():
+    periods = [20233, 20234, 20241, 20242, 20243, 20244, 20251]
+    buckets = bucket_periods(states_frame(periods), 4, flow_columns=["Distribution"], period_times="yyyyq")
+    assert buckets["Period"].tolist() == [20233, 20241, 20251]
+    assert buckets["Distribution"].tolist() == [2.0, 4.0, 1.0]
+    assert buckets["Cumulative"].tolist() == [2.0, 6.0, 7.0]
+
+
+def test_period_values_count_gaps():
+    buckets = bucket_periods(states_frame([0, 1, 5, 6, 7]), 3, flow_columns=["Distribution"], period_times="period")
+    assert buckets["Period"].tolist() == [0, 5, 6]
+    assert buckets["Distribution"].tolist() == [2.0, 1.0, 2.0]
+
+
+def test_lttb_keeps_ends_and_extremes():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[437] = 10.0  # A spike must survive downsampling
+    indices = lttb_indices(x, y, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert (np.diff(indices) > 0).all()
+    assert 437 in indices
+
+
+def test_lttb_returns_everything_when_short():
+    assert lttb_indices(np.arange(10), np.zeros(10), 50).tolist() == list(range(10))
+
+
+def test_downsample_series_bounds_total_rows():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Period": np.arange(10_000), **{f"y{i}": rng.normal(size=10_000).cumsum() for i in range(4)}})
+    for columns in [["y0"], ["y0", "y1"], ["y0", "y1", "y2", "y3"]]:
+        sampled = downsample_series(df, "Period", columns, max_points=500)
+        assert len(sampled) <= 500
+        assert sampled["Period"].is_monotonic_increasing
+        assert sampled["Period"].iloc[0] == 0 and sampled["Period"].iloc[-1] == 9_999
+
+    short = df.head(100)
+    assert downsample_series(short, "Period", ["y0"], max_points=500) is short
+
+
+def test_paginate():
+    df = pd.DataFrame({"a": range(105)})
+    rows, n_pages = paginate(df, 3, 50)
+    assert n_pages == 3
+    assert rows["a"].tolist() == list(range(100, 105))
+    assert paginate(df, 99, 50)[0]["a"].tolist() == list(range(100, 105))  # Clamped to the last page
+    assert paginate(df, 0, 50)[0]["a"].iloc[0] == 0
+    assert paginate(df.head(0), 1, 50)[1] == 1
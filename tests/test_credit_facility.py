@@ -0,0 +1,30 @@
+"""The batched facility comparison against the engines run on the facility-adjusted ledger."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.credit_facility import apply_credit_facility, bridge_draws, compare_facility_irr
+from waterfall_cases import ENGINES, SEEDS, case_for_seed, close
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_compare_facility_irr_matches_engines(seed):
+    rng, cash_flows_df, terms = case_for_seed(seed)
+    model = list(ENGINES)[seed % len(ENGINES)]
+    periods = np.unique(cash_flows_df["Period"].to_numpy())
+    lp_contributions = cash_flows_df.groupby("Period")["LP_Contribution"].sum().to_numpy()
+    draws, repayments = bridge_draws(lp_contributions, rng.uniform(0.0, 1.0, 3), rng.integers(1, 6, 3))
+    rates = rng.uniform(0.0, 0.03, 3)
+    comparison = compare_facility_irr(cash_flows_df, model, draws=draws, repayments=repayments,
+                                      interest_rate_pct=rates, **terms)
+
+    for i in range(len(rates)):
+        facility_df = pd.DataFrame({"Period": periods, "Facility_Draw": draws[i], "Facility_Repayment": repayments[i]})
+        adjusted_df = apply_credit_facility(cash_flows_df, facility_df, rates[i])
+        summary = ENGINES[model](cash_flows_df=adjusted_df, **terms)["summary_metrics"]
+        reference_irr = np.nan if summary["LP IRR"] is None else summary["LP IRR"]
+        assert close(comparison["LP IRR With Facility"][i], reference_irr, tol=1e-7), \
+            f"Facility LP IRR differs for scenario {i}"
+        assert close(adjusted_df["LP_Contribution"].sum(),
+                     lp_contributions.sum() + adjusted_df["Facility_Interest"].sum(),
+                     lp_contributions.sum()), "Facility changes total LP capital by more than its interest"
@@ -0,0 +1,41 @@
+"""The bracketing IRR solver against numpy_financial, and the running IRR against per-prefix solves."""
+import numpy as np
+import numpy_financial as npf
+import pytest
+
+from src.core.financial_utils import _irr_from_times, calculate_irr, calculate_running_irr
+from waterfall_cases import SEEDS, close
+
+
+def random_cash_flows(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 30))
+    return rng, rng.normal(0.0, 1.0, n) - np.linspace(1.0, 0.0, n)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_irr_solver_matches_numpy_financial(seed):
+    _, cash_flows = random_cash_flows(seed)
+    reference = npf.irr(cash_flows)
+    solved = _irr_from_times(cash_flows, np.arange(len(cash_flows)))
+    assert (np.isnan(reference) and solved is None) or (solved is not None and close(solved, reference)), \
+        f"IRR solver {solved} != numpy_financial {reference}"
+
+
+@pytest.mark.parametrize("span", [None, 10 ** 6, 10 ** 7])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_running_irr_matches_prefix_irr(seed, span):
+    """
+    Periods spread over about 50 steps per flow, or over `span` periods; long spans put the IRRs
+    within about 1 / span of zero, so they are compared relatively.
+    """
+    rng, cash_flows = random_cash_flows(seed)
+    n = len(cash_flows)
+    periods = np.sort(rng.choice(span or 50 * n, n, replace=False))
+    running = calculate_running_irr(cash_flows, periods)
+    for i in range(n):
+        prefix_irr = calculate_irr(cash_flows[: i + 1], periods=periods[: i + 1])
+        expected = np.nan if prefix_irr is None else prefix_irr
+        matches = (np.isclose(running[i], expected, rtol=1e-7, atol=1e-15, equal_nan=True) if span
+                   else close(running[i], expected, tol=1e-7))
+        assert matches, f"Running IRR {running[i]} != prefix IRR {expected} at {i}"
@@ -0,0 +1,62 @@
+"""
+Conservation, batch parity and running time on a large, gapped ledger, including a run with
+per-period states (and so the running IRR), which must stay well below quadratic time.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.batch_waterfall import run_waterfall_batch, stack_ledgers
+from waterfall_cases import ENGINES, close
+
+N_ROWS = 100_000
+
+# Time budget for the run with per-period states; a quadratic running IRR takes minutes
+PERIOD_STATES_SECONDS = 30.0
+
+TERMS = {"lp_commitment": 1000.0, "preferred_return_pct": 0.08, "gp_catch_up_pct": 1.0,
+         "carried_interest_gp_share_pct": 0.2}
+
+
+@pytest.fixture(scope="module")
+def large_ledger():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Period": np.sort(rng.choice(100 * N_ROWS, N_ROWS, replace=False)),
+        "LP_Contribution": rng.random(N_ROWS),
+        "GP_Contribution": rng.random(N_ROWS) * 0.1,
+        "Gross_Fund_Proceeds": rng.random(N_ROWS) * 1.2,
+    })
+
+
+@pytest.mark.parametrize("model", list(ENGINES))
+def test_large_ledger_conserves_cash_and_matches_batch(model, large_ledger):
+    total_proceeds = float(large_ledger["Gross_Fund_Proceeds"].sum())
+    summary = ENGINES[model](cash_flows_df=large_ledger, **TERMS)["summary_metrics"]
+    distributed = summary["LP Total Distributions Received"] + summary["GP Total Distributions Received"]
+    assert close(distributed, total_proceeds, total_proceeds), "Large ledger leaks cash"
+
+    stacked = stack_ledgers([large_ledger])
+    outputs = run_waterfall_batch(model, stacked["lp_contributions"], stacked["gp_contributions"],
+                                  stacked["proceeds"], **TERMS)
+    assert close(outputs["LP Distributions"].sum(), summary["LP Total Distributions Received"], total_proceeds), \
+        "Batch differs on the large ledger"
+
+
+@pytest.mark.parametrize("model", list(ENGINES))
+def test_large_ledger_period_states_run_in_time(model, large_ledger):
+    # Gaps count as elapsed periods, so the span is about 1e7 periods and the IRRs sit close to zero
+    start = time.perf_counter()
+    results = ENGINES[model](cash_flows_df=large_ledger, include_period_states=True, period_times="period", **TERMS)
+    seconds = time.perf_counter() - start
+
+    period_states = results["period_states"]
+    assert len(period_states) == N_ROWS
+    assert close(period_states["LP Cumulative Distributions"].iloc[-1],
+                 results["summary_metrics"]["LP Total Distributions Received"], N_ROWS)
+    assert np.isclose(period_states["LP Interim IRR"].iloc[-1], results["summary_metrics"]["LP IRR"], rtol=1e-6), \
+        "The last interim IRR differs from the IRR of the whole ledger"
+    assert seconds < PERIOD_STATES_SECONDS, \
+        f"Period states took {seconds:.1f}s on {N_ROWS:,} rows (limit {PERIOD_STATES_SECONDS}s)"
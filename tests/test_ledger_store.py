@@ -0,0 +1,88 @@
+"""The binary ledger cache: round trips, format versions and eviction."""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core import ledger_store
+from src.core.ledger_store import CACHE_FORMAT_VERSION, ledger_key, load_ledger
+from waterfall_cases import SEEDS, case_for_seed, close, random_case
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cached_ledger_matches_read_csv(seed, tmp_path):
+    """Cached, memory-mapped ledgers must load back exactly as pd.read_csv would."""
+    _, cash_flows_df, _ = case_for_seed(seed)
+    csv_bytes = cash_flows_df.to_csv(index=False).encode()
+    for _ in range(2):  # First load writes the cache entry, the second reads it back
+        cached = load_ledger(csv_bytes, cache_dir=str(tmp_path))
+    expected = pd.read_csv(io.BytesIO(csv_bytes))
+    for col in expected.columns:
+        assert close(cached[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float)), \
+            f"Cached column {col} differs"
+
+
+def test_stale_entries_are_replaced(tmp_path):
+    """Entries from older formats are never served and are removed; unrelated files are kept."""
+    _, cash_flows_df, _ = case_for_seed(0)
+    csv_bytes = cash_flows_df.to_csv(index=False).encode()
+    legacy_entry = tmp_path / ledger_key(csv_bytes)
+    legacy_entry.mkdir()
+    np.save(legacy_entry / "period.npy", np.zeros(1))
+    (tmp_path / f"v{CACHE_FORMAT_VERSION - 1}").mkdir()
+    (tmp_path / "notes.txt").write_text("not a cache entry")
+
+    cached = load_ledger(csv_bytes, cache_dir=str(tmp_path))
+
+    assert "NAV" in cached.columns
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", f"v{CACHE_FORMAT_VERSION}"]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    # Same length, so every entry has the same size
+    ledgers = [random_case(np.random.default_rng(seed), n_periods=20)[0].to_csv(index=False).encode()
+               for seed in range(3)]
+    load_ledger(ledgers[0], cache_dir=str(tmp_path))
+    entry_dir = tmp_path / f"v{CACHE_FORMAT_VERSION}"
+    entry_bytes = ledger_store._entry_size(entry_dir / ledger_key(ledgers[0]))
+
+    # Room for about two entries; the first is used again before the third is written
+    monkeypatch.setattr(ledger_store, "MAX_CACHE_BYTES", int(2.5 * entry_bytes))
+    load_ledger(ledgers[1], cache_dir=str(tmp_path))
+    os.utime(entry_dir / ledger_key(ledgers[1]), (0, 0))
+    load_ledger(ledgers[0], cache_dir=str(tmp_path))
+    load_ledger(ledgers[2], cache_dir=str(tmp_path))
+
+    assert sorted(os.listdir(entry_dir)) == sorted([ledger_key(ledgers[0]), ledger_key(ledgers[2])])
+
+
+@pytest.mark.parametrize("evict_before", ["utime", "nav check"])
+def test_entry_evicted_while_loading_is_rebuilt(evict_before, tmp_path, monkeypatch):
+    """Another worker may evict the entry between the existence check and the loads."""
+    _, cash_flows_df, _ = case_for_seed(0)
+    csv_bytes = cash_flows_df.to_csv(index=False).encode()
+    load_ledger(csv_bytes, cache_dir=str(tmp_path))
+    entry_dir = str(tmp_path / f"v{CACHE_FORMAT_VERSION}" / ledger_key(csv_bytes))
+
+    evictions = []
+
+    def evicting(original, name):
+        def wrapper(path, *args, **kwargs):
+            if os.path.basename(str(path)) == name and not evictions:  # Once, as one concurrent worker would
+                evictions.append(path)
+                ledger_store._remove_cache_entry(entry_dir)
+            return original(path, *args, **kwargs)
+        return wrapper
+
+    if evict_before == "utime":
+        monkeypatch.setattr(ledger_store.os, "utime", evicting(os.utime, ledger_key(csv_bytes)))
+    else:
+        monkeypatch.setattr(ledger_store.os.path, "exists", evicting(os.path.exists, "nav.npy"))
+    cached = load_ledger(csv_bytes, cache_dir=str(tmp_path))
+
+    assert evictions
+    assert "NAV" in cached.columns
+    assert close(cached["LP_Contribution"].to_numpy(), cash_flows_df["LP_Contribution"].to_numpy())
+    assert os.path.isdir(entry_dir)
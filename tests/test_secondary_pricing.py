@@ -0,0 +1,50 @@
+"""Secondary pricing: the LP NAV base against replaying the liquidation through the engines."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.secondary_pricing import price_lp_interest
+from src.core.waterfall_logic import calculate_european_waterfall
+from waterfall_cases import SEEDS, case_for_seed, close
+
+# Valuation needs a reported NAV at some period other than the last
+EDGE_CASES = [None, "zero_carry", "full_carry", "no_catch_up", "proceeds_before_contributions", "sparse_periods"]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_lp_nav_is_lp_share_of_liquidation(seed):
+    """
+    The default NAV base must equal what the LP would receive if the fund NAV were distributed
+    right after the valuation period: replay the ledger with proceeds after it replaced by the NAV.
+    European only, as the American engine would accrue pref again in the replayed extra period.
+    """
+    rng, cash_flows_df, terms = case_for_seed(seed, EDGE_CASES)
+    ledger = cash_flows_df.sort_values("Period", kind="stable")
+    periods = np.unique(ledger["Period"].to_numpy())
+    reported = ledger.dropna(subset=["NAV"]).drop_duplicates("Period", keep="last")
+    reported = reported[(reported["Period"] < periods[-1]) & (reported["NAV"] > 0)]
+    if reported.empty:
+        pytest.skip("No NAV reported before the last period")
+    valuation_period, fund_nav = reported.iloc[int(rng.integers(len(reported)))][["Period", "NAV"]]
+
+    before = ledger.assign(Gross_Fund_Proceeds=np.where(ledger["Period"] <= valuation_period,
+                                                         ledger["Gross_Fund_Proceeds"], 0.0))
+    extra = pd.DataFrame({"Period": [np.nextafter(float(valuation_period), np.inf)], "LP_Contribution": [0.0],
+                          "GP_Contribution": [0.0], "Gross_Fund_Proceeds": [fund_nav]})
+    lp_with = calculate_european_waterfall(cash_flows_df=pd.concat([before, extra], ignore_index=True), **terms)
+    lp_without = calculate_european_waterfall(cash_flows_df=before, **terms)
+    expected = (lp_with["summary_metrics"]["LP Total Distributions Received"]
+                - lp_without["summary_metrics"]["LP Total Distributions Received"])
+
+    proceeds = ledger.groupby("Period")["Gross_Fund_Proceeds"].sum().to_numpy()
+    if close(expected, 0.0, fund_nav):
+        # E.g. full carry once LP capital and pref are repaid: there is no LP NAV to quote against
+        with pytest.raises(ValueError, match="LP NAV must be positive"):
+            price_lp_interest(ledger, proceeds, "European", discount_rates=[0.0, 0.1],
+                              valuation_period=valuation_period, **terms)
+        return
+    pricing = price_lp_interest(ledger, proceeds, "European", discount_rates=[0.0, 0.1],
+                                valuation_period=valuation_period, **terms)
+
+    assert close(pricing["lp_nav"], expected, fund_nav), f"LP NAV {pricing['lp_nav'][0]} != replayed {expected}"
+    assert close(pricing["price_to_nav"], pricing["npv"] / expected, 1.0, tol=1e-7)
@@ -0,0 +1,79 @@
+"""
+Random ledgers and terms shared by the tests. Every test is parametrized by SEEDS; the seed
+also picks the edge case (see EDGE_CASES) that shapes the ledger.
+"""
+import numpy as np
+import pandas as pd
+
+from src.core.waterfall_logic import calculate_american_waterfall, calculate_european_waterfall
+
+ENGINES = {"European": calculate_european_waterfall, "American": calculate_american_waterfall}
+
+SEEDS = range(40)
+
+EDGE_CASES = [
+    None,
+    "zero_contributions",
+    "zero_carry",
+    "full_carry",
+    "no_catch_up",
+    "proceeds_before_contributions",
+    "duplicate_periods",
+    "sparse_periods",
+]
+
+
+def close(a, b, scale=1.0, tol=1e-9):
+    return np.allclose(a, b, rtol=tol, atol=tol * max(1.0, scale), equal_nan=True)
+
+
+def case_for_seed(seed, edge_cases=None):
+    """Returns (rng, cash_flows_df, terms) for `seed`, cycling through edge_cases (default EDGE_CASES)."""
+    edge_cases = EDGE_CASES if edge_cases is None else edge_cases
+    rng = np.random.default_rng(seed)
+    cash_flows_df, terms = random_case(rng, edge_cases[seed % len(edge_cases)])
+    return rng, cash_flows_df, terms
+
+
+def random_case(rng, edge_case=None, n_periods=None):
+    """Returns (cash_flows_df, terms) for a random ledger, shaped by `edge_case`."""
+    n = int(n_periods or rng.integers(1, 40))
+    periods = np.arange(n)
+    lp_contributions = rng.choice([0.0, 0.0, 5.0, 10.0, 30.0], n) * rng.uniform(0.5, 1.5, n)
+    gp_contributions = lp_contributions * rng.uniform(0.0, 0.15)
+    proceeds = rng.choice([0.0, 0.0, 20.0, 50.0, 80.0], n) * rng.uniform(0.2, 2.0, n)
+    nav = np.where(rng.random(n) < 0.7, rng.uniform(0.0, 150.0, n), np.nan)
+
+    terms = {
+        "lp_commitment": float(rng.uniform(50.0, 150.0)),
+        "preferred_return_pct": float(rng.choice([0.0, rng.uniform(0.0, 0.2)])),
+        "gp_catch_up_pct": float(rng.choice([1.0, rng.uniform(0.0, 1.0)])),
+        "carried_interest_gp_share_pct": float(rng.uniform(0.0, 0.5)),
+    }
+
+    if edge_case == "zero_contributions":
+        lp_contributions[:] = 0.0
+        gp_contributions[:] = 0.0
+    elif edge_case == "zero_carry":
+        terms["carried_interest_gp_share_pct"] = 0.0
+    elif edge_case == "full_carry":
+        terms["carried_interest_gp_share_pct"] = 1.0
+    elif edge_case == "no_catch_up":
+        terms["gp_catch_up_pct"] = 0.0
+    elif edge_case == "proceeds_before_contributions":
+        proceeds[: max(1, n // 2)] += rng.uniform(10.0, 50.0)
+        lp_contributions[: max(1, n // 2)] = 0.0
+        gp_contributions[: max(1, n // 2)] = 0.0
+    elif edge_case == "duplicate_periods":
+        periods = np.sort(rng.integers(0, max(1, n // 2), n))
+    elif edge_case == "sparse_periods":
+        periods = np.sort(rng.choice(1000 * n, n, replace=False))
+
+    cash_flows_df = pd.DataFrame({
+        "Period": periods,
+        "LP_Contribution": lp_contributions,
+        "GP_Contribution": gp_contributions,
+        "Gross_Fund_Proceeds": proceeds,
+        "NAV": nav,
+    })
+    return cash_flows_df.sample(frac=1.0, random_state=int(rng.integers(1 << 31))), terms